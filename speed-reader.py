@@ -1,35 +1,1073 @@
+import io
 import json
 import time
+MODULE_LOAD_START = time.perf_counter()
+import sys
+import argparse
+import csv
 import os
 import re
-import pygame
-import nltk
+import mmap
+import queue
+import threading
+import hashlib
+import codecs
+import posixpath
+import pickle
+import operator
+import math
+from itertools import accumulate, islice, repeat
+from collections import OrderedDict
+from array import array
+from bisect import bisect_left, bisect_right
 import tkinter as tk
 from tkinter import messagebox, ttk, filedialog, scrolledtext, font
 
-import sys
-if getattr(sys, 'frozen', False):
-    # Running as a PyInstaller bundle (executable)
-    os.environ["LLAMA_CPP_LIB_PATH"] = os.path.dirname(sys.executable) + "\\lib"
-from llama_cpp import Llama
-
 APP_TITLE = "Speed Reader"
 APP_GEOMETRY = "800x600"
 RES_DIR = "resources"
+STOP_WORDS_PATH = os.path.join(RES_DIR, "stopwords.pickle")
+SESSIONS_PATH = os.path.join(RES_DIR, "sessions.json") # Reading position per document
+SESSION_ENTRIES = 500 # Documents whose reading position is remembered
 TEXT_BG_COLOR = "#282c34"
 TEXT_FG_COLOR = "#abb2bf"
 HIGHLIGHT_FG_COLOR = "#000000"
+PIVOT_FG_COLOR = "#e06c75" # Optimal recognition point letter in RSVP mode
+STOP_WORD_FG_COLOR = "#5c6370" # Stop words in RSVP mode
+READING_MODES = ["Highlight", "RSVP"]
+RSVP_CHUNK_SIZES = [1, 2, 3, 4, 5]
+PAGE_SIZE = 64 * 1024 # Bytes per page when streaming large files
+WINDOW_PAGES = 3 # Pages kept in the text area while streaming
+POLL_INTERVAL = 50 # ms between checks for results from background threads
+CACHE_DIR = os.path.join(RES_DIR, "cache")
+MEMORY_CACHE_ENTRIES = 8 # Generated texts kept in memory in front of the disk cache
+DOCUMENT_MAGIC = b"SRDOCIDX" # First bytes of a cached document index file
+DOCUMENT_INDEX_VERSION = 3 # Bump when the tokenization or the index file layout changes
+PREFIX_STATE_ENTRIES = 4 # Evaluated prompt prefixes kept in memory
+NO_TEMPLATE = "None"
+PASSAGE_COUNTS = [1, 3, 5, 10, 20]
+PROMPT_SEPARATOR = "|" # Separates several prompts in the prompt entry
+MODEL_SERVER_ADDRESS = "127.0.0.1:8765" # Default address of the shared model server
+STUB_TEXT = "The quick brown fox jumps over the lazy dog while the reader keeps a steady pace through the page."
+TIMER_INTERVAL = 0.1 # Seconds between timer label updates
+FRAME_INTERVAL = 1 / 60 # Shortest time between two display updates
+REWIND_AGAIN_INTERVAL = 1.5 # Seconds within which skipping back again moves to the previous sentence or paragraph
+MAX_CATCH_UP_WORDS = 3 # Words highlighted together when the scheduler falls behind
+# Adaptive pacing, relative dwell of a word in units: by length (capped), less for stop words,
+# plus a pause before a new sentence or paragraph. Dwells are scaled so the average matches the WPM.
+DWELL_MAX_LENGTH = 16
+DWELL_LENGTH_UNITS = [20 + 2 * length for length in range(DWELL_MAX_LENGTH + 1)]
+DWELL_STOP_UNITS = 6
+DWELL_SENTENCE_UNITS = 20
+DWELL_PARAGRAPH_UNITS = 30
+TRACE_CAPACITY = 131072 # Reading session events kept in the trace ring buffer
+TRACE_WORD, TRACE_TICK, TRACE_START, TRACE_PAUSE, TRACE_STOP = range(5) # Kinds of trace events
+TRACE_EVENTS = ("word", "tick", "start", "pause", "stop")
+BENCHMARK_SIZES = [1_000, 100_000, 10_000_000] # Words in the synthetic benchmark texts
+BENCHMARK_TICKS = 20_000 # Highlight ticks timed per benchmark text
+COUNT_EXTENSIONS = (".txt", ".md") # Files picked up by --count in a directory tree
+COUNT_IN_FLIGHT = 4 # Files queued per --count worker process
+BENCHMARK_WPM = 1000
+INDEX_CHECK_TEXT = "Plain line.\nSmile \U0001F600 then \U0001F44D\U0001F3FD words \U0001D4B3 and \U0001F600\U0001F600 more.\n\n\U0001F389 Last line" # Text with characters outside the BMP whose highlights --benchmark checks
+
+WORD_PATTERN = re.compile(r'\b\w+\b')
+SENTENCE_PATTERN = re.compile(r'[.!?][^\w\s]*\s') # Sentences start at the next word
+PARAGRAPH_PATTERN = re.compile(r'\n[^\S\n]*\n') # Paragraphs start at the next word
+ASTRAL_PATTERN = re.compile('[\U00010000-\U0010FFFF]') # Characters outside the BMP, such as emoji
+CHARSET_PATTERN = re.compile(rb'''(?:charset|encoding)\s*=\s*["']?([\w.:-]+)''', re.IGNORECASE) # Declared encoding of HTML and XML
+ENCODING_BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16")
+]
+FALLBACK_ENCODING = "cp1252" # Used when neither the configured encoding nor UTF-8 fits
+UNPAGED_ENCODINGS = ("utf-16", "utf-32") # Encodings whose text cannot be split into pages at newline bytes
+# HTML elements that start a new paragraph, and elements whose content is never read
+BLOCK_TAGS = {"address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "figcaption", "footer",
+              "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "ol", "p", "pre", "section",
+              "table", "td", "th", "tr", "ul"}
+SKIPPED_TAGS = {"head", "script", "style", "template", "noscript", "svg", "math"}
+MARKDOWN_CHAPTER_PATTERN = re.compile(r'^(?=#{1,2}\s)', re.MULTILINE) # Chapters start at level 1 and 2 headings
+# Markdown syntax replaced by the text it marks up, in order
+MARKDOWN_PATTERNS = [
+    (re.compile(r'^(```|~~~).*$', re.MULTILINE), ''), # Code fences
+    (re.compile(r'<[^>\n]+>'), ''), # Inline HTML
+    (re.compile(r'!?\[([^\]]*)\]\([^)]*\)'), r'\1'), # Images and links
+    (re.compile(r'^[ \t]{0,3}\[[^\]]+\]:.*$', re.MULTILINE), ''), # Link definitions
+    (re.compile(r'^[ \t]{0,3}(?:#{1,6}[ \t]+|>[ \t]?|[-*+][ \t]+|\d+[.)][ \t]+)', re.MULTILINE), ''), # Headings, quotes and list markers
+    (re.compile(r'^[ \t]{0,3}(?:[-*_][ \t]*){3,}$', re.MULTILINE), ''), # Horizontal rules
+    (re.compile(r'(\*{1,3}|`+|~~)(?=\S)(.+?)(?<=\S)\1'), r'\2'), # Emphasis, inline code and strikethrough
+    (re.compile(r'(?<!\w)(_{1,3})(?=\S)(.+?)(?<=\S)\1(?!\w)'), r'\2') # Underscore emphasis, never inside words
+]
+
+def build_stop_word_file(path=STOP_WORDS_PATH):
+    """
+    Compiles NLTK's stop-word corpus into a pickle of one frozenset per language.
+    Downloads the corpus first if it is not in the resources directory yet.
+    Returns the compiled table.
+    """
+    import nltk
+    nltk.data.path.append(RES_DIR)
+    # Check if stopwords are already downloaded
+    if not os.path.exists(os.path.join(RES_DIR, "corpora/stopwords")):
+        nltk.download("stopwords", download_dir=RES_DIR)
+    from nltk.corpus import stopwords
+
+    table = {lang: frozenset(stopwords.words(lang)) for lang in stopwords.fileids()}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Written under a name of its own, so processes building it at the same time never read a partial file
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as stop_word_file:
+        pickle.dump(table, stop_word_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, path)
+    return table
+
+def load_stop_word_table(path=STOP_WORDS_PATH):
+    """
+    Loads the stop words of every language from the precompiled file.
+    The file is built from NLTK's corpus if it is missing or cannot be read.
+    Returns an empty table if neither is available.
+    """
+    try:
+        with open(path, "rb") as stop_word_file:
+            return pickle.load(stop_word_file)
+    except (OSError, pickle.UnpicklingError, EOFError) as e:
+        if not isinstance(e, FileNotFoundError):
+            print(f"Warning: Rebuilding the stop-word file: {e}")
+    try:
+        return build_stop_word_file(path)
+    except Exception as e:
+        print(f"Warning: Stop words are not available: {e}")
+        return {}
+
+def load_stop_word_store(languages, path=STOP_WORDS_PATH):
+    """
+    Loads the stop words of the configured languages into one store.
+    Words are interned, so languages sharing a word share one copy of the string.
+    """
+    table = load_stop_word_table(path)
+    return {lang: frozenset(sys.intern(word) for word in table.get(lang, ())) for lang in languages}
+
+def queue_stop_word_store(languages, results):
+    """
+    Loads the stop-word store on a background thread and puts it on the results queue.
+    An empty store is put there if loading fails, so the reader never waits for it.
+    """
+    try:
+        store = load_stop_word_store(languages)
+    except Exception as e:
+        print(f"Warning: Stop words are not available: {e}")
+        store = {lang: frozenset() for lang in languages}
+    results.put(store)
+
+def classify_languages(words, store, languages, results, cancel):
+    """
+    Classifies the words of a document for each language on a background thread.
+    Puts a (language, stop_flags) tuple on the results queue per language, then None.
+    """
+    try:
+        for lang in languages:
+            if cancel.is_set():
+                return
+            results.put((lang, build_stop_flags(words, store.get(lang, frozenset()))))
+    except ValueError:
+        # The streamed document was closed while it was being classified
+        return
+    results.put(None)
+
+def detect_encoding(data, default, markup=False):
+    """
+    Returns the encoding of a document: the one given by its byte order mark or, for markup, its declaration,
+    otherwise the configured encoding or UTF-8 if the document decodes cleanly with it.
+    """
+    for bom, encoding in ENCODING_BOMS:
+        if data.startswith(bom):
+            return encoding
+    match = CHARSET_PATTERN.search(data[:2048]) if markup else None
+    if match:
+        try:
+            return codecs.lookup(match.group(1).decode("ascii")).name
+        except LookupError:
+            pass
+    for encoding in (default, "utf-8"):
+        try:
+            data.decode(encoding)
+            return encoding
+        except (UnicodeDecodeError, LookupError):
+            pass
+    return FALLBACK_ENCODING
+
+class html_text_parser:
+    """
+    Collects the readable text of an HTML document, one paragraph per block element.
+    Mixed into html.parser's HTMLParser by html_to_text, so html.parser is only imported for HTML and EPUB documents.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.paragraphs = []
+        self.pieces = []
+        self.skipped = 0 # Depth inside elements whose content is not read
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skipped += 1
+        elif tag in BLOCK_TAGS:
+            self.end_paragraph()
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self.skipped = max(0, self.skipped - 1)
+        elif tag in BLOCK_TAGS:
+            self.end_paragraph()
+
+    def handle_data(self, data):
+        if not self.skipped:
+            self.pieces.append(data)
+
+    def end_paragraph(self):
+        """
+        Closes the current paragraph, collapsing its whitespace.
+        """
+        paragraph = " ".join("".join(self.pieces).split())
+        if paragraph:
+            self.paragraphs.append(paragraph)
+        self.pieces = []
+
+    def text(self):
+        """
+        Returns the paragraphs read so far separated by blank lines.
+        """
+        self.end_paragraph()
+        return "\n\n".join(self.paragraphs)
+
+def html_to_text(markup):
+    """
+    Strips the markup of an HTML document and returns its readable text.
+    """
+    from html.parser import HTMLParser
+    parser = type("html_text_parser", (html_text_parser, HTMLParser), {})()
+    parser.feed(markup)
+    parser.close()
+    return parser.text()
+
+def extract_html(data, encoding):
+    """
+    Extracts the text of an HTML file as a single chapter.
+    """
+    yield html_to_text(data.decode(detect_encoding(data, encoding, markup=True), errors="replace"))
+
+def extract_markdown(data, encoding):
+    """
+    Extracts the text of a Markdown file, one chapter per level 1 or 2 heading.
+    """
+    text = decode_page(data, detect_encoding(data, encoding))
+    for chapter in MARKDOWN_CHAPTER_PATTERN.split(text):
+        for pattern, replacement in MARKDOWN_PATTERNS:
+            chapter = pattern.sub(replacement, chapter)
+        chapter = re.sub(r'\n{3,}', '\n\n', chapter).strip()
+        if chapter:
+            yield chapter
+
+def extract_epub(data, encoding):
+    """
+    Extracts the text of an EPUB book, one chapter per document in its reading order (spine).
+    """
+    import zipfile
+    import xml.etree.ElementTree as ElementTree
+    from urllib.parse import unquote
+    with zipfile.ZipFile(io.BytesIO(data)) as book:
+        names = set(book.namelist())
+        try:
+            container = ElementTree.fromstring(book.read("META-INF/container.xml"))
+            opf_path = next(element.get("full-path") for element in container.iter() if element.tag.endswith("rootfile"))
+            package = ElementTree.fromstring(book.read(opf_path))
+            manifest = {item.get("id"): item.get("href") for item in package.iter() if item.tag.endswith("}item")}
+            chapters = [posixpath.normpath(posixpath.join(posixpath.dirname(opf_path), unquote(manifest[itemref.get("idref")])))
+                        for itemref in package.iter() if itemref.tag.endswith("}itemref") and itemref.get("idref") in manifest]
+        except (KeyError, StopIteration, ElementTree.ParseError):
+            # No usable package document, read the HTML files in name order
+            chapters = sorted(name for name in names if name.lower().endswith((".xhtml", ".html", ".htm")))
+        for name in chapters:
+            if name not in names:
+                continue
+            content = book.read(name)
+            text = html_to_text(content.decode(detect_encoding(content, encoding, markup=True), errors="replace"))
+            if text:
+                yield text
+
+# Extractors by file extension, each yields the text of a document chapter by chapter
+EXTRACTORS = {
+    ".epub": extract_epub,
+    ".html": extract_html,
+    ".htm": extract_html,
+    ".xhtml": extract_html,
+    ".md": extract_markdown,
+    ".markdown": extract_markdown
+}
+
+def extract_document(data, extractor, encoding, results, cancel):
+    """
+    Extracts the text of a document on a background thread.
+    Puts every chapter on the results queue as soon as it is extracted,
+    an exception instead if extraction fails, and None once it has ended.
+    """
+    try:
+        for chapter in extractor(data, encoding):
+            if cancel.is_set():
+                return
+            results.put(chapter)
+    except Exception as e:
+        results.put(e)
+    results.put(None)
+
+def session_key(data, extractor=None):
+    """
+    Identifies a document's saved reading position by the hash of its raw content and its extractor only,
+    so it survives changes that invalidate the document cache.
+    """
+    digest = hashlib.sha256(json.dumps(extractor.__name__ if extractor else None).encode("utf-8"))
+    digest.update(data)
+    return digest.hexdigest()
+
+def load_sessions(path=SESSIONS_PATH):
+    """
+    Loads the saved reading positions, keyed by document.
+    """
+    try:
+        with open(path, "r") as sessions_file:
+            return json.load(sessions_file)
+    except (OSError, ValueError):
+        return {}
+
+def save_sessions(sessions, path=SESSIONS_PATH):
+    """
+    Saves the reading positions, keeping only the most recently used documents.
+    """
+    if len(sessions) > SESSION_ENTRIES:
+        for document_id in sorted(sessions, key=lambda document_id: sessions[document_id]["saved"])[:len(sessions) - SESSION_ENTRIES]:
+            del sessions[document_id]
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w") as sessions_file:
+            json.dump(sessions, sessions_file)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        print(f"Warning: Could not save the reading position: {e}")
+
+def import_llama():
+    """
+    Imports llama_cpp the first time the model is needed and returns the Llama class.
+    """
+    if getattr(sys, 'frozen', False):
+        # Running as a PyInstaller bundle (executable)
+        os.environ["LLAMA_CPP_LIB_PATH"] = os.path.dirname(sys.executable) + "\\lib"
+    from llama_cpp import Llama
+    return Llama
+
+def build_word_index(text, offset=0):
+    """
+    Tokenizes the text into words and records where each word starts and ends.
+    Returns the word list and two arrays with the start and end character offsets,
+    shifted by offset when the text is part of a larger document.
+    """
+    words = []
+    starts = array('I')
+    ends = array('I')
+    for match in WORD_PATTERN.finditer(text):
+        words.append(match.group())
+        starts.append(match.start() + offset)
+        ends.append(match.end() + offset)
+    return words, starts, ends
+
+def text_position(index):
+    """
+    Converts a Tk "line.column" text index into a comparable (line, column) tuple.
+    """
+    line, column = index.split(".")
+    return int(line), int(column)
+
+def find_boundaries(text, offset, starts):
+    """
+    Finds the words that begin a sentence or a paragraph.
+    text starts at character offset and covers the words at starts as well as the gap before the first one.
+    Returns two arrays with the positions in starts of those words.
+    """
+    sentences = array('I')
+    paragraphs = array('I')
+    for pattern, boundaries in ((SENTENCE_PATTERN, sentences), (PARAGRAPH_PATTERN, paragraphs)):
+        for match in pattern.finditer(text):
+            index = bisect_left(starts, match.end() + offset)
+            if index < len(starts) and (not boundaries or boundaries[-1] != index):
+                boundaries.append(index)
+    return sentences, paragraphs
+
+def build_stop_flags(words, stop_words):
+    """
+    Returns a bytearray with 1 for every word that is a stop word and 0 otherwise.
+    """
+    return bytearray(word.lower() in stop_words for word in words)
+
+def build_line_starts(text):
+    """
+    Returns the character offset at which every line of the text starts.
+    """
+    line_starts = array('I', [0])
+    line_starts.extend(match.end() for match in re.finditer('\n', text))
+    return line_starts
+
+def build_astral_offsets(text):
+    """
+    Returns the character offset of every character outside the Basic Multilingual Plane in the text.
+    """
+    if text.isascii():
+        return array('I')
+    return array('I', (match.start() for match in ASTRAL_PATTERN.finditer(text)))
+
+def tk_astral_width(interp):
+    """
+    Returns how many characters Tk counts for one character outside the BMP, 2 in Tcl 8.6 and 1 in Tcl 9.
+    """
+    return int(interp.call("string", "length", "\U0001F600"))
+
+def iter_pages(data, page_size=PAGE_SIZE):
+    """
+    Splits a bytes-like buffer into pages of roughly page_size bytes.
+    Pages end after a newline, or after a space for very long lines, so words are never split.
+    Yields the start and end byte offsets of each page.
+    """
+    size = len(data)
+    start = 0
+    while start < size:
+        end = min(start + page_size, size)
+        if end < size:
+            cut = data.rfind(b'\n', start, end)
+            if cut < 0:
+                cut = data.rfind(b' ', start, end)
+            if cut < 0:
+                # No break inside the page, extend it to the next one
+                cut = data.find(b' ', end)
+                cut = size - 1 if cut < 0 else cut
+            end = cut + 1
+        yield start, end
+        start = end
+
+def page_encoding(data, default):
+    """
+    Returns the encoding of a document read page by page, detected once from its first page
+    like detect_encoding does for a whole document.
+    """
+    start, end = next(iter_pages(data), (0, 0))
+    return detect_encoding(data[start:end], default)
+
+def iter_document_texts(data, encoding, extractor=None):
+    """
+    Yields the text of a document in pieces, decoded as the reader decodes it:
+    formatted documents through their extractor and plain text page by page,
+    or at once for the encodings in UNPAGED_ENCODINGS.
+    """
+    if extractor:
+        yield from extractor(data[:], encoding)
+        return
+    encoding = page_encoding(data, encoding)
+    if encoding in UNPAGED_ENCODINGS:
+        yield decode_page(data[:], encoding)
+        return
+    for start, end in iter_pages(data):
+        yield decode_page(data[start:end], encoding)
+
+def decode_page(data, encoding):
+    """
+    Decodes a page of a streamed file with universal newlines, like a file opened in text mode.
+    """
+    return data.decode(encoding, errors="replace").replace('\r\n', '\n').replace('\r', '\n')
+
+def index_pages(data, encoding, stop_words, results, cancel):
+    """
+    Decodes and indexes a streamed document page by page.
+    Runs on a background thread and puts one tuple per page on the results queue:
+    (byte_start, byte_end, char_start, word_starts, word_ends, stop_flags, sentence_starts, paragraph_starts),
+    where the sentence and paragraph starts are positions in the page's words.
+    None is put on the queue once the whole document has been indexed.
+    """
+    char_start = 0
+    tail = "" # Text after the last word so far, which may hold the boundary before the next page's first word
+    try:
+        for byte_start, byte_end in iter_pages(data):
+            if cancel.is_set():
+                return
+            text = decode_page(data[byte_start:byte_end], encoding)
+            words, starts, ends = build_word_index(text, char_start)
+            sentences, paragraphs = find_boundaries(tail + text, char_start - len(tail), starts)
+            tail = text[ends[-1] - char_start:] if ends else tail + text
+            results.put((byte_start, byte_end, char_start, starts, ends, build_stop_flags(words, stop_words), sentences, paragraphs))
+            char_start += len(text)
+    except ValueError:
+        # The document was closed while it was being indexed
+        return
+    results.put(None)
+
+def model_settings_from(config):
+    """
+    Returns the Llama constructor settings from the configuration.
+    """
+    return {
+        "model_path": config.get("model_path", ""),
+        "n_ctx": config.get("n_ctx", 4096),
+        "n_threads": config.get("n_threads"),
+        "n_batch": config.get("n_batch", 512),
+        "use_mmap": config.get("use_mmap", True),
+        "use_mlock": config.get("use_mlock", False)
+    }
+
+def prefix_states_from(config):
+    """
+    Returns the prefix state cache sized as configured.
+    """
+    return prefix_state_cache(
+        os.path.join(CACHE_DIR, "prefixes"),
+        int(config.get("prefix_cache_disk_mb", 2048) * 1024 * 1024),
+        memory_entries=PREFIX_STATE_ENTRIES,
+        memory_bytes=int(config.get("prefix_cache_memory_mb", 512) * 1024 * 1024)
+    )
+
+def prefix_key(prefix, model_settings):
+    """
+    Returns the cache key of the evaluated state of a prompt prefix.
+    """
+    return prefix_state_cache.make_key(prefix, model_settings["model_path"], {"n_ctx": model_settings["n_ctx"]})
+
+def parse_address(address):
+    """
+    Splits a "host:port" address.
+    """
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+def load_llm(model_settings, results, server=None):
+    """
+    Loads the LLM on a background thread.
+    Uses the model server at server instead when one is configured and running.
+    Puts the loaded model on the results queue, or the exception if loading failed.
+    """
+    try:
+        if server:
+            llm = remote_llm(server)
+            if llm.available():
+                results.put(llm)
+                return
+        Llama = import_llama()
+        results.put(Llama(verbose=False, **model_settings))
+    except Exception as e:
+        results.put(e)
+
+def restore_prefix(llm, prefix, key, states):
+    """
+    Loads the evaluated state of a prompt prefix into the LLM, evaluating and caching it first if needed.
+    A completion whose prompt starts with the prefix then only evaluates the rest of the prompt.
+    Must be called with the LLM lock held.
+    """
+    state = states.get(key)
+    if state is None:
+        llm.reset()
+        llm.eval(llm.tokenize(prefix.encode("utf-8")))
+        states.put(key, llm.save_state())
+    else:
+        llm.load_state(state)
+
+def warm_prefixes(llm, lock, prefixes, states):
+    """
+    Evaluates the prefixes of the prompt templates on a background thread,
+    so the first generation from each template is as fast as the following ones.
+    """
+    try:
+        for prefix, key in prefixes:
+            with lock:
+                restore_prefix(llm, prefix, key, states)
+    except Exception as e:
+        print(f"Warning: Could not evaluate prompt prefix: {e}")
+
+def complete(llm, prompt, params, prefix=None, states=None):
+    """
+    Starts a streamed completion and returns its chunks.
+    prefix is an optional (text, key) pair whose cached state is restored first.
+    A model server restores prefixes itself, so only the prefix text is sent along.
+    """
+    if isinstance(llm, remote_llm):
+        return llm(prompt=prompt, stream=True, prefix=prefix[0] if prefix else None, **params)
+    if prefix and states is not None:
+        restore_prefix(llm, *prefix, states)
+    return llm(prompt=prompt, stream=True, **params)
+
+def stream_completion(llm, lock, prompt, params, results, cancel, prefix=None, states=None):
+    """
+    Runs a streamed LLM completion on a background thread.
+    Every piece of generated text is put on the results queue as soon as it is produced,
+    an exception is put instead if the generation fails, and None is put once it has ended.
+    """
+    try:
+        with lock:
+            for chunk in complete(llm, prompt, params, prefix, states):
+                if cancel.is_set():
+                    break
+                results.put(chunk['choices'][0]['text'])
+    except Exception as e:
+        results.put(e)
+    results.put(None)
+
+def put_until_cancelled(target, item, cancel):
+    """
+    Puts item on a bounded queue, waiting while it is full, unless cancel is set first.
+    Returns True if the item was put.
+    """
+    while not cancel.is_set():
+        try:
+            target.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def pregenerate_passages(llm, lock, plan, passages, cancel, done, states):
+    """
+    Generates the passages of a drill one after the other on a background thread.
+    plan holds (prompt, prefix, params, key, cached_text) tuples, cached passages are passed on without generating.
+    Each passage is put on the bounded passages queue with its cache key, or the exception that stopped it,
+    which holds the generation back while the reader has enough passages buffered.
+    done is set once every passage has been queued or the drill was cancelled.
+    """
+    for prompt, prefix, params, key, cached_text in plan:
+        if cancel.is_set():
+            break
+        text = cached_text
+        if text is None:
+            try:
+                pieces = []
+                with lock:
+                    for chunk in complete(llm, prompt, params, prefix, states):
+                        if cancel.is_set():
+                            break
+                        pieces.append(chunk['choices'][0]['text'])
+                text = "".join(pieces)
+            except Exception as e:
+                text = e
+        if not put_until_cancelled(passages, (key, text), cancel):
+            break
+    done.set()
+
+def orp_index(word):
+    """
+    Returns the index of the optimal recognition point of a word,
+    the letter slightly left of the middle where the eye should fixate.
+    """
+    length = len(word)
+    if length <= 1:
+        return 0
+    if length <= 5:
+        return 1
+    if length <= 9:
+        return 2
+    if length <= 13:
+        return 3
+    return 4
+
+def chunk_pivot(words):
+    """
+    Joins a chunk of words for RSVP display and returns it with the index of its pivot letter,
+    the optimal recognition point of the middle word.
+    """
+    middle = (len(words) - 1) // 2
+    prefix = sum(len(word) + 1 for word in words[:middle])
+    return " ".join(words), prefix + orp_index(words[middle])
+
+class startup_profile:
+    """
+    Records how long each startup phase takes, reported with --profile-startup.
+    """
+
+    def __init__(self, start):
+        self.last = start
+        self.start = start
+        self.phases = []
+
+    def mark(self, phase):
+        """
+        Ends the current phase, naming it phase, and starts the next one.
+        """
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        """
+        Prints the duration of every phase and the total to stderr.
+        """
+        for phase, seconds in self.phases:
+            print(f"{phase:<16}{seconds * 1000:9.1f} ms", file=sys.stderr)
+        print(f"{'total':<16}{(self.last - self.start) * 1000:9.1f} ms", file=sys.stderr)
+
+class session_trace:
+    """
+    Ring buffer of reading session events: words shown, scheduler ticks, starts, pauses and stops.
+    The arrays are allocated once, so recording an event is a few stores,
+    and the oldest events are overwritten once the buffer is full.
+    """
+
+    def __init__(self, capacity=TRACE_CAPACITY):
+        self.capacity = capacity
+        self.kinds = bytearray(capacity)
+        self.word_indexes = array('q', bytes(8 * capacity))
+        self.scheduled = array('d', bytes(8 * capacity)) # When the word or tick was due
+        self.actual = array('d', bytes(8 * capacity)) # When it was shown or ran
+        self.durations = array('d', bytes(8 * capacity)) # Time spent showing it or in the tick
+        self.clear()
+
+    def clear(self):
+        """
+        Starts a new session.
+        """
+        self.count = 0
+        self.origin = time.perf_counter()
+
+    def record(self, kind, word_index, scheduled, actual, duration=0.0):
+        """
+        Records an event, times are perf_counter values.
+        """
+        position = self.count % self.capacity
+        self.kinds[position] = kind
+        self.word_indexes[position] = word_index
+        self.scheduled[position] = scheduled
+        self.actual[position] = actual
+        self.durations[position] = duration
+        self.count += 1
+
+    def events(self):
+        """
+        Yields the recorded events, oldest first, as (event, word, scheduled, actual, duration) tuples
+        with times in seconds since the session started.
+        """
+        for number in range(max(0, self.count - self.capacity), self.count):
+            position = number % self.capacity
+            yield (TRACE_EVENTS[self.kinds[position]], self.word_indexes[position],
+                   self.scheduled[position] - self.origin, self.actual[position] - self.origin, self.durations[position])
+
+    def summary(self, target_wpm, now=None):
+        """
+        Summarizes the recorded events: lag percentiles of ticks and words,
+        time spent showing words, pauses, and effective versus target WPM.
+        """
+        tick_lags = []
+        word_lags = []
+        word_costs = []
+        active = paused = 0
+        pauses = 0
+        events = list(self.events())
+        started = stopped = None
+        if self.count > self.capacity and events:
+            started = events[0][3] # The start of the session has been overwritten
+        for event, _, scheduled, actual, duration in events:
+            if event == "word":
+                word_lags.append(actual - scheduled)
+                word_costs.append(duration)
+            elif event == "tick":
+                tick_lags.append(actual - scheduled)
+            elif event == "start":
+                if stopped is not None:
+                    paused += actual - stopped
+                started, stopped = actual, None
+            elif started is not None:
+                active += actual - started
+                started, stopped = None, actual
+                pauses += event == "pause"
+        if started is not None:
+            active += (now or time.perf_counter()) - self.origin - started
+
+        def milliseconds(values):
+            values.sort()
+            return {name: percentile(values, fraction) * 1000 for name, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))}
+
+        return {
+            "events": min(self.count, self.capacity),
+            "dropped_events": max(0, self.count - self.capacity),
+            "words": len(word_lags),
+            "target_wpm": target_wpm,
+            "effective_wpm": len(word_lags) / (active / 60) if active > 0 else 0,
+            "reading_seconds": active,
+            "pauses": pauses,
+            "paused_seconds": paused,
+            "tick_lag_ms": milliseconds(tick_lags),
+            "word_lag_ms": milliseconds(word_lags),
+            "word_display_ms": milliseconds(word_costs)
+        }
+
+    def export(self, path, target_wpm):
+        """
+        Writes the events to a CSV file, or to a JSON file with the summary when path ends in .json.
+        """
+        with open(path, "w", newline="") as trace_file:
+            if path.lower().endswith(".json"):
+                events = [dict(zip(("event", "word", "scheduled", "actual", "duration"), event)) for event in self.events()]
+                json.dump({"summary": self.summary(target_wpm), "events": events}, trace_file, indent=1)
+            else:
+                writer = csv.writer(trace_file)
+                writer.writerow(["event", "word", "scheduled", "actual", "duration"])
+                writer.writerows(self.events())
+
+class generation_cache:
+    """
+    Cache of generated texts keyed by prompt, model file and sampling parameters.
+    Recent entries are kept in memory, all entries are stored on disk up to max_bytes,
+    and the least recently used entries are evicted first.
+    """
+
+    suffix = ".txt"
+
+    def __init__(self, directory, max_bytes, memory_entries=MEMORY_CACHE_ENTRIES, memory_bytes=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.memory_bytes = memory_bytes
+        self.memory = OrderedDict()
+        self.memory_size = 0
+
+    @staticmethod
+    def make_key(prompt, model_path, params):
+        """
+        Hashes the prompt, the identity of the model file (path, size and mtime) and the sampling parameters.
+        """
+        try:
+            stat = os.stat(model_path)
+            model_id = [os.path.abspath(model_path), stat.st_size, stat.st_mtime_ns]
+        except OSError:
+            model_id = [model_path]
+        data = json.dumps([prompt, model_id, params], sort_keys=True)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Returns the cached text for key, or None if it is not cached.
+        """
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key]
+
+        path = os.path.join(self.directory, key + self.suffix)
+        try:
+            value = self.read(path)
+            os.utime(path) # The modification time records the last use
+        except OSError:
+            return None
+        self.remember(key, value)
+        return value
+
+    def put(self, key, value):
+        """
+        Stores value for key in memory and on disk, then evicts old entries if the disk cache is too large.
+        """
+        self.remember(key, value)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, key + self.suffix)
+            self.write(path + ".tmp", value)
+            os.replace(path + ".tmp", path)
+            self.evict()
+        except OSError as e:
+            print(f"Warning: Could not write to the cache in {self.directory}: {e}")
+
+    def read(self, path):
+        """
+        Reads a cached value from its file.
+        """
+        with open(path, "r", encoding="utf-8") as file:
+            return file.read()
+
+    def write(self, path, value):
+        """
+        Writes a cached value to its file.
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(value)
 
-nltk.data.path.append(RES_DIR)
-# Check if stopwords are already downloaded
-if not os.path.exists(os.path.join(RES_DIR, "corpora/stopwords")):
-    nltk.download("stopwords", download_dir=RES_DIR)
-from nltk.corpus import stopwords
+    def size_of(self, value):
+        """
+        Returns the approximate memory used by a cached value.
+        """
+        return len(value)
+
+    def remember(self, key, value):
+        """
+        Adds an entry to the in-memory tier, dropping the least recently used ones when it is full.
+        """
+        if key in self.memory:
+            self.memory_size -= self.size_of(self.memory[key])
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        self.memory_size += self.size_of(value)
+        while len(self.memory) > self.memory_entries or (self.memory_bytes is not None and len(self.memory) > 1 and self.memory_size > self.memory_bytes):
+            _, dropped = self.memory.popitem(last=False)
+            self.memory_size -= self.size_of(dropped)
+
+    def evict(self):
+        """
+        Removes the least recently used files until the disk cache fits in max_bytes.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self.suffix):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+class prefix_state_cache(generation_cache):
+    """
+    Cache of evaluated LLM states for prompt prefixes, keyed by prefix, model file and context size.
+    States are large, so the memory tier is limited in bytes as well as in entries.
+    """
+
+    suffix = ".state"
+
+    def read(self, path):
+        """
+        Unpickles a cached state.
+        """
+        with open(path, "rb") as file:
+            return pickle.load(file)
+
+    def write(self, path, state):
+        """
+        Pickles a state to its file.
+        """
+        with open(path, "wb") as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def size_of(self, state):
+        """
+        Returns the size of the llama.cpp state plus the saved logits and tokens.
+        """
+        return state.llama_state_size + state.scores.nbytes + state.input_ids.nbytes
+
+class document_cache(generation_cache):
+    """
+    Cache of indexed documents keyed by the hash of their content.
+    Each entry holds the normalized text, the words, their offsets and stop flags in one binary file:
+    the magic bytes, the length of a JSON header listing the sections, then the sections themselves.
+    Entries are only read back from disk, memory-mapped, so the memory tier is not used.
+    """
+
+    suffix = ".doc"
+
+    def __init__(self, directory, max_bytes):
+        super().__init__(directory, max_bytes, memory_entries=0)
+
+    @staticmethod
+    def make_key(data, encoding, extractor=None):
+        """
+        Hashes the raw content of a document together with everything its index depends on:
+        the extractor of its format, the encoding, the tokenizer, the index layout and the stop-word file.
+        """
+        try:
+            stop_words_id = os.stat(STOP_WORDS_PATH).st_mtime_ns
+        except OSError:
+            stop_words_id = None
+        extractor_name = extractor.__name__ if extractor else None
+        digest = hashlib.sha256(json.dumps([DOCUMENT_INDEX_VERSION, WORD_PATTERN.pattern, extractor_name, encoding, sys.byteorder, stop_words_id]).encode("utf-8"))
+        digest.update(data)
+        return digest.hexdigest()
+
+    def read(self, path):
+        """
+        Maps a cached document and copies its sections out.
+        Returns a dict with text, words, word_starts, word_ends, line_starts, sentence_starts,
+        paragraph_starts and the stop flags per language.
+        """
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[:len(DOCUMENT_MAGIC)] != DOCUMENT_MAGIC:
+                raise OSError(f"{path} is not a document index")
+            header_start = len(DOCUMENT_MAGIC) + 4
+            header = json.loads(data[header_start:header_start + int.from_bytes(data[len(DOCUMENT_MAGIC):header_start], "little")])
+            sections = {name: data[start:start + length] for name, start, length in header["sections"]}
+
+        document = {"text": sections["text"].decode("utf-8")}
+        document["words"] = sections["words"].decode("utf-8").split("\0") if sections["words"] else []
+        for name in ("word_starts", "word_ends", "line_starts", "sentence_starts", "paragraph_starts"):
+            document[name] = array('I')
+            document[name].frombytes(sections[name])
+        document["flags"] = {lang: bytearray(sections["flags:" + lang]) for lang in header["languages"]}
+        return document
+
+    def write(self, path, document):
+        """
+        Writes a document index, aligning every section to 8 bytes.
+        Words never contain NUL characters, so they are stored joined by them.
+        """
+        sections = [
+            ("text", document["text"].encode("utf-8")),
+            ("words", "\0".join(document["words"]).encode("utf-8")),
+            ("word_starts", document["word_starts"].tobytes()),
+            ("word_ends", document["word_ends"].tobytes()),
+            ("line_starts", document["line_starts"].tobytes()),
+            ("sentence_starts", document["sentence_starts"].tobytes()),
+            ("paragraph_starts", document["paragraph_starts"].tobytes())
+        ]
+        sections += [("flags:" + lang, bytes(flags)) for lang, flags in document["flags"].items()]
+
+        # The header size depends on the offsets it lists, so lay the sections out after a generous estimate
+        header_size = 256 + 64 * len(sections)
+        layout = []
+        offset = len(DOCUMENT_MAGIC) + 4 + header_size
+        for name, content in sections:
+            layout.append([name, offset, len(content)])
+            offset += len(content) + (-len(content) % 8)
+        header = json.dumps({"languages": list(document["flags"]), "sections": layout}).encode("utf-8")
+        if len(header) > header_size:
+            raise OSError("Document index header is too large")
+
+        with open(path, "wb") as file:
+            file.write(DOCUMENT_MAGIC + len(header).to_bytes(4, "little") + header.ljust(header_size, b" "))
+            for name, content in sections:
+                file.write(content + bytes(-len(content) % 8))
+
+    def size_of(self, document):
+        """
+        Returns the length of a document's text.
+        """
+        return len(document["text"])
+
+class paged_words:
+    """
+    Sequence of the words of a streamed document.
+    Words are sliced from their page on demand instead of being kept in memory.
+    """
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.cached_page = (None, "") # Each sequence has its own cache so it can be used from another thread
+
+    def __len__(self):
+        return len(self.reader.word_starts)
+
+    def __getitem__(self, index):
+        start = self.reader.word_starts[index]
+        end = self.reader.word_ends[index]
+        page = bisect_right(self.reader.page_char_starts, start) - 1
+        page_start = self.reader.page_char_starts[page]
+        if self.cached_page[0] != page:
+            data = self.reader.mapped[self.reader.page_byte_starts[page]:self.reader.page_byte_ends[page]]
+            self.cached_page = (page, decode_page(data, self.reader.stream_encoding))
+        return self.cached_page[1][start - page_start:end - page_start]
 
 class speed_reader:
 
-    def __init__(self, master):
+    def __init__(self, master, profile=None):
         self.master = master
+        self.profile = profile or startup_profile(time.perf_counter())
         self.master.title(APP_TITLE)
         self.master.geometry(APP_GEOMETRY)
 
@@ -46,18 +1084,105 @@ class speed_reader:
         self.highlighting_color = TEXT_BG_COLOR
         self.highlighting_color2 = TEXT_BG_COLOR
 
-        self.words = []
-        self.current_word_index = 0
-        self.last_highlight_pos = 0
+        self.init_reading_state()
+        self.astral_extra = tk_astral_width(self.master.tk) - 1
 
+        self.llm = None
         self.model_loaded = False
+        self.model_loading = False
+        self.pending_prompt = None # Prompt to generate from once the model has loaded
+        self.llm_lock = threading.Lock()
+        self.generating = False
+        self.generation_key = None
+        self.generation_failed = False
+        self.passage_queue = None # Passages generated ahead of the reader
+        self.passage_cancel = None
+        self.passage_done = None
+        self.next_pending = False
+        self.indexed_upto = 0 # Character offset up to which generated text has been indexed
         self.load_config()
-
-        self.load_stop_words()
-
-        self.sound_available = self.init_sound()
+        self.sessions = load_sessions()
+        self.profile.mark("config")
+
+        # Stop words of every configured language are loaded once in the background
+        self.stop_word_table = {}
+        self.stop_words = frozenset()
+        stop_word_results = queue.Queue()
+        threading.Thread(target=queue_stop_word_store, args=([lang.lower() for lang in self.languages], stop_word_results), daemon=True).start()
+        self.master.after(POLL_INTERVAL, lambda: self.poll_stop_words(stop_word_results))
+        self.profile.mark("stop words")
+
+        self.pygame = None # Imported when Sound is first turned on
  
         self.create_widgets()
+        self.profile.mark("widgets")
+
+        self.master.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        if self.preload_model:
+            # Load the model once the window is up
+            self.master.after_idle(self.load_model)
+
+    def init_reading_state(self):
+        """
+        Initializes the word index, pacing and streaming state.
+        Kept apart from the widgets so the hot paths can be benchmarked headless.
+        """
+        self.words = []
+        self.word_starts = array('I')
+        self.word_ends = array('I')
+        self.stop_flags = bytearray()
+        self.stop_flag_cache = {} # Stop flags of the loaded document per language
+        self.document_key = None # Cache key of a loaded file whose index is not cached yet
+        self.classify_results = None
+        self.classify_cancel = None
+        self.line_starts = array('I', [0])
+        self.astral_offsets = array('I') # Offsets of the characters outside the BMP, relative like line_starts
+        self.astral_extra = 0 # Extra Tk characters counted for each of them
+        self.sentence_starts = array('I', [0]) # Indexes of the words that begin a sentence
+        self.paragraph_starts = array('I', [0]) # Indexes of the words that begin a paragraph
+        self.document_id = None # Key of the loaded document's saved reading position
+        self.current_word_index = 0
+        self.last_highlight = None # (tag, start, end) of the highlighted word
+        self.rewind_target = None # Word the last skip back moved to, until the position is moved elsewhere
+        self.rewind_at = 0 # When the last skip back happened
+
+        # Pacing scheduler, word N is due at pace_anchor_time + (N - pace_anchor_index) * word_interval
+        self.scheduled_tick = None
+        self.pace_anchor_time = 0
+        self.pace_anchor_index = 0
+        self.pace_wpm = 0
+        self.word_interval = 0
+        self.words_batched = 0 # Words shown together with the previous one to catch up
+        self.words_read = 0 # Words shown in the current session
+
+        # Adaptive pacing, word N is due at pace_anchor_time + (dwell_at(N) - pace_anchor_dwell) * dwell_scale
+        self.adaptive_pacing = False
+        self.dwell_lengths = array('Q', [0]) # Cumulative length and pause units before each word
+        self.dwell_stops = array('I', [0]) # Cumulative number of stop words before each word
+        self.pace_anchor_dwell = 0
+        self.dwell_scale = 0 # Seconds per dwell unit
+        self.tick_due = 0 # When the pending scheduler tick should run, to measure its lag
+        self.timer_shown_at = 0 # When the timer label was last updated
+        self.last_frame_at = 0 # When words were last shown, frames are at least FRAME_INTERVAL apart
+        self.visible_range = None # First and last visible (line, column) of the text area, None when it moved
+        self.session_stats = {} # Measured and target WPM of the last session
+
+        # Streaming state, used when a large file is read page by page
+        self.mapped = None
+        self.stream_encoding = "utf-8" # Encoding of the streamed file, detected from its first page
+        self.content_loading = False
+        self.stream_results = None
+        self.stream_cancel = None
+        self.indexed_stop_words = None
+        self.page_byte_starts = array('Q')
+        self.page_byte_ends = array('Q')
+        self.page_char_starts = array('Q')
+        self.cached_page = (None, "")
+        self.window_first = 0
+        self.window_last = 0
+        self.window_texts = []
+        self.window_base = 0 # Character offset of the first character in the text area
 
     def load_config(self):
         """
@@ -70,6 +1195,13 @@ class speed_reader:
                 self.sound_path = config.get("sound_path", "")
                 self.wpm_values = config.get("wpm_values", [150, 200, 250, 300, 350, 400])
                 self.languages = config.get("languages", ["English"])
+                self.rsvp_chunk_size = config.get("rsvp_chunk_size", 1)
+                self.adaptive_pacing = config.get("adaptive_pacing", False)
+                self.encoding = config.get("encoding", "utf-8")
+                self.stream_threshold = int(config.get("stream_threshold_mb", 16) * 1024 * 1024)
+                self.trace = session_trace(config.get("trace_events", TRACE_CAPACITY))
+                # Indexed documents are cached on disk so reopening them skips tokenization
+                self.document_cache = document_cache(os.path.join(CACHE_DIR, "documents"), int(config.get("document_cache_mb", 512) * 1024 * 1024))
                 # Hardcoded color options
                 self.color_options = {
                     "#": "None",
@@ -78,10 +1210,24 @@ class speed_reader:
                     "#FF00FF": "Magenta",
                     "#00FFFF": "Cyan"
                 }
-                
 
-                self.llm = Llama(model_path=self.model_path, verbose=False, n_ctx=4096)
-                self.model_loaded = True
+                # The model itself is loaded in the background by load_model,
+                # or shared with other windows through the model server if one is running
+                self.preload_model = config.get("preload_model", True)
+                self.model_settings = model_settings_from(config)
+                self.model_server = config.get("model_server")
+
+                # Sampling parameters, a fixed seed makes generations repeatable
+                self.generation_params = {"max_tokens": 0, **config.get("sampling", {})}
+                if config.get("seed") is not None:
+                    self.generation_params["seed"] = config["seed"]
+                self.generation_cache = generation_cache(os.path.join(CACHE_DIR, "generations"), int(config.get("generation_cache_mb", 64) * 1024 * 1024))
+
+                # Prompt templates, "{prompt}" is replaced by the prompt entry.
+                # The text before it is evaluated once and its state reused.
+                self.prompt_templates = config.get("prompt_templates", {})
+                self.pregenerate_buffer = config.get("pregenerate_buffer", 2)
+                self.prefix_states = prefix_states_from(config)
         except FileNotFoundError:
             messagebox.showerror("Error", "Config file not found. Please create a config.json file with the required settings.")
             self.master.quit()
@@ -94,9 +1240,93 @@ class speed_reader:
 
     def load_stop_words(self, lang="english"):
         """
-        Loads stop words for the specified language.
+        Selects the stop words for the specified language from the preloaded store.
+        """
+        self.stop_words = self.stop_word_table.get(lang, frozenset())
+
+    def poll_stop_words(self, results):
+        """
+        Picks up the stop-word store once it has been loaded and classifies the loaded words.
+        """
+        try:
+            self.stop_word_table = results.get_nowait()
+        except queue.Empty:
+            self.master.after(POLL_INTERVAL, lambda: self.poll_stop_words(results))
+            return
+
+        self.load_stop_words(self.language_var.get().lower())
+        if self.mapped is None:
+            self.stop_flags = build_stop_flags(self.words, self.stop_words)
+            self.update_dwell_stops()
+        if not self.content_loading:
+            # A streamed document is classified by the worker, like every other language
+            self.start_classification(stale=self.mapped is not None)
+
+    def start_classification(self, known=None, stale=False):
+        """
+        Caches the stop flags of the loaded document for the current language
+        and classifies it for the other configured languages in the background.
+        known holds flags that are already available, e.g. from the document cache.
+        With stale, the current flags belong to another language and the current language is classified first.
+        """
+        lang = self.language_var.get().lower()
+        self.stop_flag_cache = dict(known or {})
+        if not stale:
+            self.stop_flag_cache[lang] = self.stop_flags
+        others = [other.lower() for other in self.languages if other.lower() not in self.stop_flag_cache]
+        others.sort(key=lambda other: other != lang)
+        if not self.stop_word_table:
+            return
+        if not others or not self.word_starts:
+            self.store_document()
+            return
+
+        words = paged_words(self) if self.mapped is not None else self.words
+        self.classify_results = queue.Queue()
+        self.classify_cancel = threading.Event()
+        threading.Thread(target=classify_languages, args=(words, self.stop_word_table, others, self.classify_results, self.classify_cancel), daemon=True).start()
+        self.master.after(POLL_INTERVAL, lambda results=self.classify_results: self.poll_classification(results))
+
+    def poll_classification(self, results):
+        """
+        Adds the stop flags classified in the background to the per-language cache.
+        """
+        if results is not self.classify_results:
+            return # A different document has been loaded since
+        try:
+            while True:
+                result = results.get_nowait()
+                if result is None:
+                    self.classify_results = None
+                    self.store_document()
+                    return
+                lang, flags = result
+                if lang == self.language_var.get().lower() and lang not in self.stop_flag_cache:
+                    # The flags of the current language were still pending, the old ones were shown until now
+                    self.stop_flags = flags
+                    self.update_dwell_stops()
+                self.stop_flag_cache[lang] = flags
+        except queue.Empty:
+            pass
+        self.master.after(POLL_INTERVAL, lambda: self.poll_classification(results))
+
+    def store_document(self):
+        """
+        Writes the index of a loaded file to the document cache once it has been classified for every language.
         """
-        self.stop_words = set(stopwords.words(lang))
+        if self.document_key is None:
+            return
+        self.document_cache.put(self.document_key, {
+            "text": self.plain_text,
+            "words": self.words,
+            "word_starts": self.word_starts,
+            "word_ends": self.word_ends,
+            "line_starts": self.line_starts,
+            "sentence_starts": self.sentence_starts,
+            "paragraph_starts": self.paragraph_starts,
+            "flags": self.stop_flag_cache
+        })
+        self.document_key = None
 
     def create_widgets(self):
         """
@@ -109,17 +1339,40 @@ class speed_reader:
         # Prompt label
         tk.Label(input_frame, text="Enter prompt:").pack(side=tk.LEFT, padx=(0, 5))
 
-        # Prompt input
-        self.prompt_entry = tk.Entry(input_frame, width=50)
+        # Prompt input, changing the prompt cancels the passages generated ahead
+        self.prompt_var = tk.StringVar()
+        self.prompt_var.trace_add("write", lambda *args: self.cancel_pregeneration())
+        self.prompt_entry = tk.Entry(input_frame, textvariable=self.prompt_var, width=50)
         self.prompt_entry.pack(side=tk.LEFT, padx=(0, 5))
 
+        # Prompt template
+        self.template_var = tk.StringVar(value=NO_TEMPLATE)
+        self.template_combobox = ttk.Combobox(input_frame, textvariable=self.template_var, values=[NO_TEMPLATE] + list(self.prompt_templates), state="readonly", width=12)
+        self.template_combobox.pack(side=tk.LEFT, padx=(0, 5))
+        self.template_combobox.bind("<<ComboboxSelected>>", lambda event: self.cancel_pregeneration())
+
         # Generate button
-        self.generate_button = tk.Button(input_frame, text="Generate Text", command=self.generate_text, state=tk.DISABLED if not self.model_loaded else tk.NORMAL)
+        self.generate_button = tk.Button(input_frame, text="Generate Text", command=self.generate_text, state=tk.DISABLED if not self.model_path else tk.NORMAL)
         self.generate_button.pack(side=tk.LEFT, padx=(0, 5))
 
         # Load button
         self.load_button = tk.Button(input_frame, text="Load Text", command=self.load_file)
         self.load_button.pack(side=tk.LEFT, padx=(0, 5))
+
+        # Drill: passages generated ahead of the reader
+        drill_frame = tk.Frame(self.master)
+        drill_frame.pack(pady=5)
+
+        tk.Label(drill_frame, text="Passages:").pack(side=tk.LEFT, padx=5)
+        self.passages_var = tk.StringVar(value=str(PASSAGE_COUNTS[0]))
+        self.passages_combobox = ttk.Combobox(drill_frame, textvariable=self.passages_var, values=PASSAGE_COUNTS, state="readonly", width=3)
+        self.passages_combobox.pack(side=tk.LEFT, padx=5)
+
+        self.next_button = tk.Button(drill_frame, text="Next passage", command=self.next_passage, state=tk.DISABLED)
+        self.next_button.pack(side=tk.LEFT, padx=5)
+
+        self.buffer_label = tk.Label(drill_frame, text="Buffered: 0")
+        self.buffer_label.pack(side=tk.LEFT, padx=5)
  
         # Highlighting
         self.config_frame = tk.Frame(self.master)
@@ -147,8 +1400,25 @@ class speed_reader:
         self.wpm_combobox = ttk.Combobox(self.config_frame, textvariable=self.wpm_var, values=self.wpm_values, state="readonly", width=5)
         self.wpm_combobox.pack(side=tk.LEFT, padx=5)
 
+        # Reading mode and RSVP chunk size
+        tk.Label(self.config_frame, text="Mode:").pack(side=tk.LEFT, padx=5)
+        self.mode_var = tk.StringVar(value=READING_MODES[0])
+        self.mode_combobox = ttk.Combobox(self.config_frame, textvariable=self.mode_var, values=READING_MODES, state="readonly", width=9)
+        self.mode_combobox.pack(side=tk.LEFT, padx=5)
+        self.mode_combobox.bind("<<ComboboxSelected>>", self.on_select_mode)
+
+        tk.Label(self.config_frame, text="Chunk:").pack(side=tk.LEFT, padx=5)
+        self.chunk_var = tk.StringVar(value=str(self.rsvp_chunk_size))
+        self.chunk_combobox = ttk.Combobox(self.config_frame, textvariable=self.chunk_var, values=RSVP_CHUNK_SIZES, state="readonly", width=2)
+        self.chunk_combobox.pack(side=tk.LEFT, padx=5)
+
+        # Adaptive pacing control
+        self.adaptive_var = tk.BooleanVar(value=self.adaptive_pacing)
+        self.adaptive_button = tk.Checkbutton(self.config_frame, text="Adaptive", variable=self.adaptive_var, command=self.toggle_adaptive)
+        self.adaptive_button.pack(side=tk.LEFT, padx=5)
+
         # Sound control   
-        if self.sound_available:
+        if self.sound_path:
             sound_state = "normal"
         else:
             sound_state = "disabled"
@@ -172,20 +1442,45 @@ class speed_reader:
         self.stop_button = tk.Button(self.timer_frame, text="⏹", command=self.stop_timer, state=tk.DISABLED)
         self.stop_button.pack(side=tk.LEFT, padx=5)
 
-        self.reset_button = tk.Button(self.timer_frame, text="🔄", command=self.reset_timer, state=tk.DISABLED)
+        self.reset_button = tk.Button(self.timer_frame, text="🔄", command=self.start_over, state=tk.DISABLED)
         self.reset_button.pack(side=tk.LEFT, padx=5)
 
+        # Skip back and forward by paragraph and by sentence
+        self.previous_paragraph_button = tk.Button(self.timer_frame, text="⏮", command=lambda: self.skip(self.paragraph_starts, -1))
+        self.previous_paragraph_button.pack(side=tk.LEFT, padx=(5, 0))
+        self.previous_sentence_button = tk.Button(self.timer_frame, text="⏪", command=lambda: self.skip(self.sentence_starts, -1))
+        self.previous_sentence_button.pack(side=tk.LEFT)
+        self.next_sentence_button = tk.Button(self.timer_frame, text="⏩", command=lambda: self.skip(self.sentence_starts, 1))
+        self.next_sentence_button.pack(side=tk.LEFT)
+        self.next_paragraph_button = tk.Button(self.timer_frame, text="⏭", command=lambda: self.skip(self.paragraph_starts, 1))
+        self.next_paragraph_button.pack(side=tk.LEFT, padx=(0, 5))
+
+        self.trace_button = tk.Button(self.timer_frame, text="📊", command=self.show_trace_summary)
+        self.trace_button.pack(side=tk.LEFT, padx=5)
+
         # Word count
         self.word_count_label = tk.Label(self.timer_frame, text="Words: 0")
         self.word_count_label.pack(side=tk.LEFT, padx=10)
 
         # Text display area - Use scrolledtext.ScrolledText
         self.text_area = scrolledtext.ScrolledText(self.master, wrap=tk.WORD, font=self.normal_font)
+        self.text_area.configure(yscrollcommand=self.on_text_scroll)
         self.text_area.pack(pady=10, padx=10, expand=True, fill=tk.BOTH)
         self.text_area.configure(background=TEXT_BG_COLOR, foreground=TEXT_FG_COLOR)
         self.text_area.config(state='disabled') # Start as read-only
         self.configure_tags() # Configure tags after text_area is created
 
+        # RSVP display, shown instead of the text area in RSVP mode
+        self.rsvp_font = font.Font(family="Segoe UI", size=32)
+        self.rsvp_canvas = tk.Canvas(self.master, background=TEXT_BG_COLOR, highlightthickness=0)
+        self.rsvp_guides = [self.rsvp_canvas.create_line(0, 0, 0, 0, fill=TEXT_FG_COLOR) for _ in range(2)]
+        self.rsvp_left = self.rsvp_canvas.create_text(0, 0, anchor="e", font=self.rsvp_font)
+        self.rsvp_pivot = self.rsvp_canvas.create_text(0, 0, anchor="center", font=self.rsvp_font, fill=PIVOT_FG_COLOR)
+        self.rsvp_right = self.rsvp_canvas.create_text(0, 0, anchor="w", font=self.rsvp_font)
+        self.rsvp_center = (0, 0)
+        self.rsvp_shown = ("", 0, TEXT_FG_COLOR) # Text, pivot and color drawn last
+        self.rsvp_canvas.bind("<Configure>", self.on_rsvp_resize)
+
     def configure_tags(self):
         """Configures text tags for highlighting."""
         # Ensure a valid highlight color is set
@@ -240,59 +1535,335 @@ class speed_reader:
         return f'#{r:02x}{g:02x}{b:02x}'
    
 
-    def highlight_words(self):
+    def is_visible(self, start, end):
         """
-        Highlights words in the text area one by one using tags.
+        Returns True if the text between the Tk indexes start and end is in view.
+        The visible range is looked up once and reused until the text area scrolls or resizes.
+        The last display line may be cut off, so it does not count as visible.
         """
-        if self.highlighting_enabled and self.highlighting_running and self.current_word_index < len(self.words):
-            start_time = time.perf_counter()
+        if self.visible_range is None:
+            first = self.text_area.index("@0,0")
+            last = self.text_area.index(f"@0,{self.text_area.winfo_height()}")
+            self.visible_range = (text_position(first), text_position(last))
+        first, last = self.visible_range
+        return first <= text_position(start) and text_position(end) <= last
+
+    def on_text_scroll(self, first, last):
+        """
+        Forgets the visible range whenever the view of the text area changes, then updates the scrollbar.
+        """
+        self.visible_range = None
+        self.text_area.vbar.set(first, last)
 
-            # Remove previous highlight tags before applying new ones
-            self.text_area.tag_remove("highlight", "1.0", tk.END)
-            self.text_area.tag_remove("stop_highlight", "1.0", tk.END)
+    def text_index(self, offset):
+        """
+        Converts a character offset into a Tk "line.column" text index.
+        """
+        offset -= self.window_base
+        line = bisect_right(self.line_starts, offset) - 1
+        column = offset - self.line_starts[line]
+        if self.astral_offsets:
+            # Tk counts the characters outside the BMP before the offset on its line twice
+            astral = bisect_left(self.astral_offsets, offset) - bisect_left(self.astral_offsets, self.line_starts[line])
+            column += astral * self.astral_extra
+        return f"{line + 1}.{column}"
+
+    def index_lines(self, text):
+        """
+        Indexes the lines and the characters outside the BMP of the text in the text area.
+        """
+        self.line_starts = build_line_starts(text)
+        self.astral_offsets = build_astral_offsets(text) if self.astral_extra else array('I')
 
-            word = self.words[self.current_word_index]
-            tag_to_use = "stop_highlight" if word.lower() in self.stop_words else "highlight"
+    def set_pace_anchor(self, now):
+        """
+        Makes the current word due at now, with the following words paced at the selected WPM.
+        Called when reading starts or resumes, when the WPM changes and after stalls.
+        """
+        self.pace_anchor_time = now
+        self.pace_anchor_index = self.current_word_index
+        self.pace_wpm = int(self.wpm_var.get())
+        self.word_interval = 60 / self.pace_wpm
+        if self.adaptive_pacing:
+            # Rescale the dwells so the words indexed so far average word_interval
+            count = len(self.dwell_lengths) - 1
+            total = self.dwell_at(count)
+            self.dwell_scale = self.word_interval * count / total if total else 0
+            self.pace_anchor_dwell = self.dwell_at(min(self.pace_anchor_index, count))
+
+    def word_deadline(self, index):
+        """
+        Returns the perf_counter time at which the word at index is due.
+        """
+        if not self.adaptive_pacing or not self.dwell_scale:
+            return self.pace_anchor_time + (index - self.pace_anchor_index) * self.word_interval
+        count = len(self.dwell_lengths) - 1
+        if index > count:
+            # Not indexed yet, assume average words after the last one
+            return self.pace_anchor_time + (self.dwell_at(count) - self.pace_anchor_dwell) * self.dwell_scale + (index - count) * self.word_interval
+        return self.pace_anchor_time + (self.dwell_at(index) - self.pace_anchor_dwell) * self.dwell_scale
+
+    def due_index(self, now):
+        """
+        Returns the index of the last word that is due at now.
+        """
+        if not self.adaptive_pacing or not self.dwell_scale:
+            return self.pace_anchor_index + int((now - self.pace_anchor_time) / self.word_interval)
+        target = self.pace_anchor_dwell + (now - self.pace_anchor_time) / self.dwell_scale
+        return bisect_right(range(len(self.dwell_lengths)), target, key=self.dwell_at) - 1
 
-            # Search for the word starting from the last highlighted position
-            # Use regexp=True for whole word matching
-            start_pos = self.text_area.search(r'\m' + re.escape(word) + r'\M', self.last_highlight_end_pos, tk.END, regexp=True)
+    def dwell_at(self, index):
+        """
+        Returns the dwell units of the words before index.
+        """
+        return self.dwell_lengths[index] - DWELL_STOP_UNITS * self.dwell_stops[index]
 
-            if start_pos:
-                end_pos = f"{start_pos}+{len(word)}c" # Calculate end position
-                self.text_area.tag_add(tag_to_use, start_pos, end_pos)
-                self.text_area.see(start_pos) # Ensure the highlighted word is visible
-                self.last_highlight_end_pos = end_pos # Update position for the next search
-            else:
-                # Word not found (shouldn't normally happen if self.words is accurate)
-                # Optionally handle this case, e.g., log a warning or stop
-                print(f"Warning: Word '{word}' not found starting from {self.last_highlight_end_pos}")
-                self.stop_timer()
+    def extend_dwell(self):
+        """
+        Extends the cumulative dwell arrays to the words indexed since the last call.
+        The dwell before a word depends on the length and stop flag of the word shown before it
+        and on whether it starts a sentence or a paragraph. All of it is computed with builtins in C,
+        only the boundaries are visited one by one.
+        """
+        if not self.adaptive_pacing:
+            return
+        count = len(self.word_starts)
+        # The last entry gave the final word no pause as no word followed yet, so recompute it
+        first = len(self.dwell_lengths) - 1
+        if count <= first or count == 0:
+            return
+        first = max(first, 1)
+        del self.dwell_lengths[first:]
+        del self.dwell_stops[first:]
+
+        lengths = map(operator.sub, self.word_ends[first - 1:count], self.word_starts[first - 1:count])
+        units = array('Q', map(DWELL_LENGTH_UNITS.__getitem__, map(min, lengths, repeat(DWELL_MAX_LENGTH))))
+        for boundaries, pause in ((self.sentence_starts, DWELL_SENTENCE_UNITS), (self.paragraph_starts, DWELL_PARAGRAPH_UNITS)):
+            for index in boundaries[bisect_left(boundaries, first):bisect_left(boundaries, count)]:
+                units[index - first] += pause
+        self.dwell_lengths.extend(islice(accumulate(units, initial=self.dwell_lengths[-1]), 1, None))
+        self.dwell_stops.extend(islice(accumulate(self.stop_flags[first - 1:count], initial=self.dwell_stops[-1]), 1, None))
+
+    def rebuild_dwell(self):
+        """
+        Recomputes the dwell arrays of the whole document.
+        """
+        self.dwell_lengths = array('Q', [0])
+        self.dwell_stops = array('I', [0])
+        self.extend_dwell()
+
+    def update_dwell_stops(self):
+        """
+        Recounts the stop words in the dwell arrays after the stop flags changed, e.g. with the language.
+        The length and pause units do not change, so only one pass over the flags is needed.
+        """
+        if not self.adaptive_pacing:
+            return
+        count = len(self.dwell_lengths) - 1
+        self.dwell_stops = array('I', accumulate(self.stop_flags[:count], initial=0))
+        if self.timer_running:
+            self.set_pace_anchor(time.perf_counter())
+
+    def toggle_adaptive(self):
+        """
+        Switches between adaptive and uniform pacing, continuing from the current word.
+        """
+        self.adaptive_pacing = self.adaptive_var.get()
+        self.rebuild_dwell()
+        if self.timer_running:
+            self.set_pace_anchor(time.perf_counter())
 
-            self.current_word_index += 1
-            end_time = time.perf_counter()
+    def start_scheduler(self):
+        """
+        Starts the tick loop that drives the timer label and word highlighting.
+        """
+        self.cancel_scheduler()
+        self.tick_due = time.perf_counter()
+        self.scheduler_tick()
 
-            if self.current_word_index < len(self.words):
-                wpm = int(self.wpm_var.get())
-                highlight_time = int((end_time - start_time) * 1000)
-                delay = max(1, int(60000 / wpm) - highlight_time) # Ensure delay is at least 1ms
-                self.master.after(delay, self.highlight_words)
-            else:
+    def cancel_scheduler(self):
+        """
+        Cancels the pending scheduler tick, if any.
+        """
+        if self.scheduled_tick:
+            self.master.after_cancel(self.scheduled_tick)
+            self.scheduled_tick = None
+
+    def scheduler_tick(self):
+        """
+        Renders one frame: updates the timer and shows the words that are due, then sleeps until the next deadline.
+        Deadlines are computed from the pace anchor, so after() jitter does not accumulate.
+        All display changes of a frame are made in this one callback, so Tk redraws once for them,
+        and frames that show words are at least FRAME_INTERVAL apart; words due in between are shown together.
+        """
+        self.scheduled_tick = None
+        if not self.timer_running:
+            return
+
+        now = time.perf_counter()
+        if now - self.timer_shown_at >= TIMER_INTERVAL:
+            self.update_timer(now)
+            self.timer_shown_at = now
+        next_tick = self.timer_shown_at + TIMER_INTERVAL
+
+        if self.highlighting_running:
+            if int(self.wpm_var.get()) != self.pace_wpm:
+                self.set_pace_anchor(now)
+
+            if self.current_word_index < len(self.word_starts):
+                first = self.current_word_index
+                if now >= self.word_deadline(first):
+                    scheduled = self.word_deadline(first)
+                    if self.mode_var.get() == "RSVP":
+                        self.show_chunk(now)
+                    else:
+                        self.highlight_words(now)
+                    shown = time.perf_counter()
+                    self.last_frame_at = now
+                    self.words_read += self.current_word_index - first
+                    for index in range(first, self.current_word_index):
+                        self.trace.record(TRACE_WORD, index, scheduled if index == first else self.word_deadline(index), shown, shown - now)
+            elif self.content_loading:
+                # Caught up with the words indexed so far, the next one is due as soon as it arrives
+                self.set_pace_anchor(now)
+                next_tick = min(next_tick, now + POLL_INTERVAL / 1000)
+            elif now >= self.word_deadline(self.current_word_index):
+                # The last word has had its full time
                 self.stop_timer()
-        elif self.highlighting_running:
-            self.stop_timer()
+                return
+            next_tick = min(next_tick, self.word_deadline(self.current_word_index))
+
+        ended = time.perf_counter()
+        self.trace.record(TRACE_TICK, self.current_word_index, self.tick_due, now, ended - now)
+        next_tick = max(next_tick, self.last_frame_at + FRAME_INTERVAL)
+        # Round up, waking before the deadline would only cost another tick
+        delay = max(1, math.ceil((next_tick - ended) * 1000))
+        self.tick_due = ended + delay / 1000
+        self.scheduled_tick = self.master.after(delay, self.scheduler_tick)
+
+    def highlight_words(self, now):
+        """
+        Highlights the words that are due at now using tags.
+        Word positions come from the index built in update_content.
+        When the scheduler is late, the words it missed are highlighted together.
+        """
+        first = self.current_word_index
+        due = self.due_index(now)
+        last = max(first, min(due, first + MAX_CATCH_UP_WORDS - 1, len(self.word_starts) - 1))
+        # Too far behind to catch up (e.g. the event loop stalled), continue from here
+        stalled = due > last and last < len(self.word_starts) - 1
+
+        # Remove only the previous word's highlight
+        if self.last_highlight:
+            self.text_area.tag_remove(*self.last_highlight)
+            self.last_highlight = None
+
+        self.ensure_window(self.word_starts[last])
+        if self.word_starts[first] < self.window_base:
+            first = last # The missed words have been paged out
+        if first == last:
+            tag_to_use = "stop_highlight" if self.stop_flags[first] else "highlight"
+        else:
+            tag_to_use = "highlight"
+            self.words_batched += last - first
+        start_pos = self.text_index(self.word_starts[first])
+        end_pos = self.text_index(self.word_ends[last])
+
+        self.text_area.tag_add(tag_to_use, start_pos, end_pos)
+        if not self.is_visible(start_pos, end_pos):
+            self.text_area.see(start_pos) # Scroll only when the highlighted word is out of view
+            self.visible_range = None
+        self.last_highlight = (tag_to_use, start_pos, end_pos)
+
+        self.current_word_index = last + 1
+        if stalled:
+            self.set_pace_anchor(now + self.word_interval)
+
+    def show_chunk(self, now):
+        """
+        Shows the next chunk of words in the RSVP display, aligned on its optimal recognition point.
+        Only the canvas items are updated, so the cost does not depend on the document length.
+        """
+        first = self.current_word_index
+        last = min(first + int(self.chunk_var.get()), len(self.word_starts)) - 1
+        # More than a chunk behind (e.g. the event loop stalled), continue from here
+        due = self.due_index(now)
+        stalled = due > last + (last + 1 - first)
+
+        words = [self.words[index] for index in range(first, last + 1)]
+        text, pivot = chunk_pivot(words)
+        color = STOP_WORD_FG_COLOR if all(self.stop_flags[first:last + 1]) else TEXT_FG_COLOR
+        if (text, pivot, color) != self.rsvp_shown:
+            self.draw_rsvp(text, pivot, color)
+
+        self.current_word_index = last + 1
+        if stalled:
+            self.set_pace_anchor(now + (last + 1 - first) * self.word_interval)
+
+    def draw_rsvp(self, text, pivot, color):
+        """
+        Draws text on the RSVP canvas with the letter at pivot fixed at the center.
+        """
+        self.rsvp_shown = (text, pivot, color)
+        x, y = self.rsvp_center
+        half_width = self.rsvp_font.measure(text[pivot:pivot + 1]) / 2
+        self.rsvp_canvas.itemconfigure(self.rsvp_left, text=text[:pivot], fill=color)
+        self.rsvp_canvas.coords(self.rsvp_left, x - half_width, y)
+        self.rsvp_canvas.itemconfigure(self.rsvp_pivot, text=text[pivot:pivot + 1])
+        self.rsvp_canvas.coords(self.rsvp_pivot, x, y)
+        self.rsvp_canvas.itemconfigure(self.rsvp_right, text=text[pivot + 1:], fill=color)
+        self.rsvp_canvas.coords(self.rsvp_right, x + half_width, y)
+
+    def on_rsvp_resize(self, event):
+        """
+        Keeps the RSVP pivot and its guide marks in the center of the canvas.
+        """
+        x, y = event.width / 2, event.height / 2
+        self.rsvp_center = (x, y)
+        linespace = self.rsvp_font.metrics("linespace")
+        self.rsvp_canvas.coords(self.rsvp_guides[0], x, y - linespace, x, y - linespace * 0.7)
+        self.rsvp_canvas.coords(self.rsvp_guides[1], x, y + linespace * 0.7, x, y + linespace)
+        self.draw_rsvp(*self.rsvp_shown)
+
+    def clear_rsvp(self):
+        """
+        Removes the word shown in the RSVP display.
+        """
+        self.draw_rsvp("", 0, TEXT_FG_COLOR)
 
-    def update_content(self, file_type):
+    def update_content(self, file_type, document=None, document_key=None, session_id=None):
         """
         Updates the content of the text area and resets the timer.
         Uses plain text insertion and tags.
+        Builds the word offset index used by highlight_words, or takes it from a cached document.
+        The index is stored under document_key once it has been classified,
+        and reading resumes where it stopped the last time the document with session_id was open.
         """
-        # Get words (case-insensitive for stop word check later)
-        self.words = re.findall(r'\b\w+\b', self.plain_text)
+        self.close_document()
+        lang = self.language_var.get().lower()
+        known = {}
+        self.document_id = session_id
+        if document:
+            self.words, self.word_starts, self.word_ends = document["words"], document["word_starts"], document["word_ends"]
+            self.line_starts = document["line_starts"]
+            self.astral_offsets = build_astral_offsets(self.plain_text) if self.astral_extra else array('I')
+            self.sentence_starts, self.paragraph_starts = document["sentence_starts"], document["paragraph_starts"]
+            known = document["flags"]
+            if all(other.lower() in known for other in self.languages):
+                document_key = None # Already cached for every language
+        else:
+            self.words, self.word_starts, self.word_ends = build_word_index(self.plain_text)
+            self.index_lines(self.plain_text)
+            self.sentence_starts = array('I', [0])
+            self.paragraph_starts = array('I', [0])
+            self.add_boundaries(*find_boundaries(self.plain_text, 0, self.word_starts), 0)
+        self.stop_flags = known[lang] if lang in known else build_stop_flags(self.words, self.stop_words)
+        self.rebuild_dwell()
+        self.document_key = document_key
         self.word_count = len(self.words)
         self.word_count_label.config(text=f"Words: {self.word_count}")
         self.current_word_index = 0
-        self.last_highlight_end_pos = "1.0" # Reset search position
+        self.last_highlight = None
 
         # Enable editing, clear, insert new text, disable editing
         self.text_area.config(state='normal')
@@ -304,59 +1875,562 @@ class speed_reader:
         self.reset_timer()
         self.start_button.config(state=tk.NORMAL if self.word_count > 0 else tk.DISABLED)
         self.reset_button.config(state=tk.NORMAL if self.word_count > 0 else tk.DISABLED)
+        self.start_classification(known)
+        self.restore_session()
 
     def load_file(self):
         """
         Opens a file dialog to load a text file.
+        Files larger than the configured threshold are streamed instead of read at once.
         """
         # Open file dialog to select a text file
-        file_path = filedialog.askopenfilename(filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
-        
+        file_path = filedialog.askopenfilename(filetypes=[
+            ("Documents", "*.txt *.md *.markdown *.html *.htm *.xhtml *.epub"),
+            ("Text files", "*.txt"),
+            ("All files", "*.*")
+        ])
+
         if file_path:
-            file_type = os.path.splitext(file_path)[1].lstrip('.')
-            # Read the content of the file
-            with open(file_path, 'r') as file:
-                self.plain_text = file.read()
+            extension = os.path.splitext(file_path)[1].lower()
+            extractor = EXTRACTORS.get(extension)
+            if extractor is None and os.path.getsize(file_path) >= self.stream_threshold:
+                if self.stream_file(file_path):
+                    return
+
+            file_type = extension.lstrip('.')
+            # Read the content of the file, or its index if the same content was opened before
+            with open(file_path, 'rb') as file:
+                data = file.read()
+            key = document_cache.make_key(data, self.encoding, extractor)
+            document = self.document_cache.get(key)
+            if document:
+                self.plain_text = document["text"]
+            elif extractor:
+                self.extract_file(data, extractor, key)
+                return
+            else:
+                self.plain_text = decode_page(data, detect_encoding(data, self.encoding))
+
+            self.update_content(file_type, document, key, session_key(data, extractor))
+
+    def extract_file(self, data, extractor, key):
+        """
+        Extracts the text of a formatted document in the background.
+        Chapters are added to the text area as they are extracted, so reading can start with the first one.
+        """
+        self.clear_content()
+        self.document_id = session_key(data, extractor)
+        self.restore_session()
+        self.content_loading = True
+        self.stream_results = queue.Queue()
+        self.stream_cancel = threading.Event()
+        threading.Thread(target=extract_document, args=(data, extractor, self.encoding, self.stream_results, self.stream_cancel), daemon=True).start()
+        self.master.after(POLL_INTERVAL, lambda results=self.stream_results: self.poll_extraction(results, key))
+
+    def poll_extraction(self, results, key):
+        """
+        Appends the chapters extracted so far to the text area and indexes them.
+        The document is cached under key once it has been extracted completely.
+        """
+        if results is not self.stream_results:
+            return # A different document has been loaded since
+
+        chapters = []
+        done = False
+        failed = False
+        try:
+            while True:
+                chapter = results.get_nowait()
+                if chapter is None:
+                    done = True
+                    break
+                if isinstance(chapter, Exception):
+                    failed = True
+                    messagebox.showerror("Error", f"Failed to read the document: {str(chapter)}")
+                    continue
+                chapters.append(chapter)
+        except queue.Empty:
+            pass
+
+        if chapters:
+            self.append_text("\n\n".join(chapters), separator="\n\n")
+        if chapters or done:
+            self.index_appended_text(done)
+            self.update_word_count()
+
+        if done:
+            self.content_loading = False
+            if not failed:
+                self.document_key = key
+            self.start_classification()
+        else:
+            self.master.after(POLL_INTERVAL, lambda: self.poll_extraction(results, key))
+
+    def stream_file(self, file_path):
+        """
+        Loads a large text file without reading it all at once.
+        The file is memory-mapped and indexed page by page on a background thread,
+        while the text area only holds a window of pages around the reading position.
+        Returns False without loading anything for the encodings in UNPAGED_ENCODINGS,
+        so the file is read at once instead.
+        """
+        with open(file_path, 'rb') as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            # Hashing the whole file would defeat streaming, so it is identified by its path, size and mtime
+            stat = os.fstat(file.fileno())
+        encoding = page_encoding(mapped, self.encoding)
+        if encoding in UNPAGED_ENCODINGS:
+            mapped.close()
+            return False
+
+        self.clear_content()
+        self.mapped = mapped
+        self.stream_encoding = encoding
+        self.words = paged_words(self)
+        self.document_id = hashlib.sha256(json.dumps([os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns]).encode("utf-8")).hexdigest()
+        self.restore_session()
+
+        # Index the file in the background and pick up the pages as they are ready
+        self.content_loading = True
+        self.indexed_stop_words = self.stop_words
+        self.stream_results = queue.Queue()
+        self.stream_cancel = threading.Event()
+        threading.Thread(target=index_pages, args=(self.mapped, self.stream_encoding, self.stop_words, self.stream_results, self.stream_cancel), daemon=True).start()
+        self.master.after(POLL_INTERVAL, lambda results=self.stream_results: self.poll_stream(results))
+        return True
+
+    def poll_stream(self, results):
+        """
+        Moves the pages indexed by the background thread into the word index
+        and fills the text area window while it has room.
+        """
+        if results is not self.stream_results:
+            return # A different document has been loaded since
+
+        try:
+            while True:
+                page = results.get_nowait()
+                if page is None:
+                    self.content_loading = False
+                    break
+                byte_start, byte_end, char_start, starts, ends, flags, sentences, paragraphs = page
+                self.page_byte_starts.append(byte_start)
+                self.page_byte_ends.append(byte_end)
+                self.page_char_starts.append(char_start)
+                self.add_boundaries(sentences, paragraphs, len(self.word_starts))
+                self.word_starts.extend(starts)
+                self.word_ends.extend(ends)
+                self.stop_flags.extend(flags)
+        except queue.Empty:
+            pass
+
+        while self.window_last - self.window_first < WINDOW_PAGES and self.window_last < len(self.page_char_starts):
+            self.advance_window()
+        self.extend_dwell()
+
+        if not self.content_loading:
+            # If the language changed while the document was being indexed, its flags are classified again
+            self.start_classification(stale=self.indexed_stop_words is not self.stop_words)
+
+        self.update_word_count()
+        if self.content_loading:
+            self.master.after(POLL_INTERVAL, lambda: self.poll_stream(results))
+
+    def clear_content(self):
+        """
+        Empties the text area and the word index before content is loaded incrementally.
+        """
+        self.close_document()
+        self.plain_text = ""
+        self.words = []
+        self.word_starts = array('I')
+        self.word_ends = array('I')
+        self.stop_flags = bytearray()
+        self.line_starts = array('I', [0])
+        self.astral_offsets = array('I')
+        self.sentence_starts = array('I', [0])
+        self.paragraph_starts = array('I', [0])
+        self.dwell_lengths = array('Q', [0])
+        self.dwell_stops = array('I', [0])
+        self.indexed_upto = 0
+        self.word_count = 0
+        self.word_count_label.config(text="Words: 0")
+        self.current_word_index = 0
+        self.last_highlight = None
+
+        self.text_area.config(state='normal')
+        self.text_area.delete('1.0', tk.END)
+        self.text_area.config(state='disabled')
+        self.reset_timer()
+
+    def update_word_count(self):
+        """
+        Shows the number of words indexed so far and enables reading once there are any.
+        """
+        self.word_count = len(self.word_starts)
+        self.word_count_label.config(text=f"Words: {self.word_count}")
+        if self.word_count > 0 and not self.timer_running:
+            self.start_button.config(state=tk.NORMAL)
+            self.reset_button.config(state=tk.NORMAL)
+
+    def close_document(self):
+        """
+        Saves the reading position, stops any background indexing or generation
+        and releases the streamed file, if any.
+        """
+        self.save_session()
+        self.document_id = None
+        if self.stream_cancel:
+            self.stream_cancel.set()
+        if self.classify_cancel:
+            self.classify_cancel.set()
+        if self.generating:
+            self.finish_generation()
+        self.stop_flag_cache = {}
+        self.document_key = None
+        self.classify_results = None
+        self.classify_cancel = None
+        self.stream_results = None
+        self.stream_cancel = None
+        self.content_loading = False
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+        self.page_byte_starts = array('Q')
+        self.page_byte_ends = array('Q')
+        self.page_char_starts = array('Q')
+        self.cached_page = (None, "")
+        self.window_first = 0
+        self.window_last = 0
+        self.window_texts = []
+        self.window_base = 0
+
+    def page_text(self, page):
+        """
+        Returns the decoded text of a page of the streamed document.
+        """
+        if self.cached_page[0] != page:
+            data = self.mapped[self.page_byte_starts[page]:self.page_byte_ends[page]]
+            self.cached_page = (page, decode_page(data, self.stream_encoding))
+        return self.cached_page[1]
+
+    def show_pages(self, first_page):
+        """
+        Replaces the text area content with the window of pages starting at first_page.
+        """
+        self.window_first = first_page
+        self.window_last = min(first_page + WINDOW_PAGES, len(self.page_char_starts))
+        self.window_texts = [self.page_text(page) for page in range(self.window_first, self.window_last)]
+        self.window_base = self.page_char_starts[first_page]
+        text = "".join(self.window_texts)
+        self.index_lines(text)
+
+        self.text_area.config(state='normal')
+        self.text_area.delete('1.0', tk.END)
+        self.text_area.insert('1.0', text)
+        self.text_area.config(state='disabled')
+        self.visible_range = None
+
+    def advance_window(self):
+        """
+        Appends the next page to the text area, dropping the first page once the window is full.
+        """
+        text = self.page_text(self.window_last)
+        self.text_area.config(state='normal')
+        self.text_area.insert('end-1c', text)
+        self.window_texts.append(text)
+        self.window_last += 1
+
+        if self.window_last - self.window_first > WINDOW_PAGES:
+            dropped = self.window_texts.pop(0)
+            self.text_area.delete('1.0', self.text_index(self.window_base + len(dropped)))
+            self.window_first += 1
+            self.window_base += len(dropped)
+        self.text_area.config(state='disabled')
+        self.index_lines("".join(self.window_texts))
+        self.visible_range = None
+
+    def ensure_window(self, offset):
+        """
+        Makes sure the character at offset is in the text area while streaming.
+        Pages in the next page once the reader enters the last page of the window.
+        """
+        if self.mapped is None:
+            return
+        page = bisect_right(self.page_char_starts, offset) - 1
+        if page < self.window_first or page >= self.window_last:
+            self.show_pages(max(0, page - 1))
+        elif page == self.window_last - 1 and self.window_last < len(self.page_char_starts):
+            self.advance_window()
+
+    def load_model(self):
+        """
+        Starts loading the LLM on a background thread, unless it is loaded or loading already.
+        """
+        if self.model_loaded or self.model_loading:
+            return
+        self.model_loading = True
+        self.generate_button.config(text="Loading model...", state=tk.DISABLED)
+
+        results = queue.Queue()
+        threading.Thread(target=load_llm, args=(self.model_settings, results, self.model_server), daemon=True).start()
+        self.master.after(POLL_INTERVAL, lambda: self.poll_model(results))
+
+    def poll_model(self, results):
+        """
+        Checks whether the background model load has finished and updates the Generate button.
+        """
+        try:
+            model = results.get_nowait()
+        except queue.Empty:
+            self.master.after(POLL_INTERVAL, lambda: self.poll_model(results))
+            return
 
-            self.update_content(file_type)
+        self.model_loading = False
+        self.generate_button.config(text="Generate Text", state=tk.NORMAL)
+        if isinstance(model, Exception):
+            self.pending_prompt = None
+            messagebox.showerror("Error", f"Failed to load model: {str(model)}")
+            return
+
+        self.llm = model
+        self.model_loaded = True
+        prefixes = [self.template_prefix(template) for template in self.prompt_templates.values()]
+        prefixes = [prefix for prefix in prefixes if prefix]
+        if prefixes and not isinstance(self.llm, remote_llm): # The model server keeps its own prefixes
+            threading.Thread(target=warm_prefixes, args=(self.llm, self.llm_lock, prefixes, self.prefix_states), daemon=True).start()
+        if self.pending_prompt:
+            prompt, self.pending_prompt = self.pending_prompt, None
+            self.start_generation(prompt)
 
     def generate_text(self):
         """
-        Sets up the UI for text generation and schedules the LLM call.
+        Starts generating text from the prompt, or cancels the generation in progress.
+        Loads the model first if it has not been loaded yet.
         """
+        if self.generating:
+            self.stream_cancel.set()
+            self.generate_button.config(state=tk.DISABLED) # Until the current token is done
+            return
+
         prompt = self.prompt_entry.get()
-        if not prompt:
+        if not prompt.strip(PROMPT_SEPARATOR + " "):
             messagebox.showwarning("Warning", "Please enter a prompt.")
             return
 
-        # Disable button and set cursor immediately
-        self.generate_button.config(state=tk.DISABLED)
-        self.master.config(cursor="wait")
-        self.master.update() # Force UI update for cursor
+        if not self.model_loaded:
+            self.pending_prompt = prompt
+            self.load_model()
+            return
 
-        # Schedule the actual generation task
-        self.master.after(10, lambda p=prompt: self._perform_generation(p))
+        self.start_generation(prompt)
 
-    def _perform_generation(self, prompt):
+    def start_generation(self, entry_text):
+        """
+        Generates the first passage of the prompts in the prompt entry and,
+        for a drill of several passages, starts generating the rest ahead of the reader.
+        """
+        prompts = [prompt.strip() for prompt in entry_text.split(PROMPT_SEPARATOR) if prompt.strip()]
+        plan = prompts * int(self.passages_var.get())
+        self._perform_generation(plan[0])
+        self.start_pregeneration(plan[1:])
+
+    def compose_prompt(self, prompt):
+        """
+        Applies the selected prompt template.
+        Returns the full prompt and the template's (text, cache key) prefix, or None.
+        """
+        template = self.prompt_templates.get(self.template_var.get())
+        if template:
+            return template.replace("{prompt}", prompt), self.template_prefix(template)
+        return f"{prompt}.", None
+
+    def start_pregeneration(self, prompts):
+        """
+        Starts generating the passages for prompts on a background thread,
+        keeping at most pregenerate_buffer finished passages ahead of the reader.
+        """
+        self.cancel_pregeneration()
+        if not prompts:
+            return
+
+        plan = []
+        for number, prompt in enumerate(prompts, start=1):
+            full_prompt, prefix = self.compose_prompt(prompt)
+            params = dict(self.generation_params)
+            if "seed" in params:
+                params["seed"] += number # Repeatable, but different passages for the same prompt
+            key = generation_cache.make_key(full_prompt, self.model_path, {**params, "passage": number})
+            plan.append((full_prompt, prefix, params, key, self.generation_cache.get(key)))
+
+        self.passage_queue = queue.Queue(maxsize=max(1, self.pregenerate_buffer))
+        self.passage_cancel = threading.Event()
+        self.passage_done = threading.Event()
+        threading.Thread(target=pregenerate_passages, args=(self.llm, self.llm_lock, plan, self.passage_queue, self.passage_cancel, self.passage_done, self.prefix_states), daemon=True).start()
+        self.next_button.config(state=tk.NORMAL)
+        self.master.after(POLL_INTERVAL, lambda passages=self.passage_queue: self.poll_passages(passages))
+
+    def cancel_pregeneration(self):
+        """
+        Stops generating passages ahead and drops the buffered ones.
+        """
+        if self.passage_cancel:
+            self.passage_cancel.set()
+        self.passage_queue = None
+        self.passage_cancel = None
+        self.passage_done = None
+        self.next_pending = False
+        self.next_button.config(text="Next passage", state=tk.DISABLED)
+        self.buffer_label.config(text="Buffered: 0")
+
+    def poll_passages(self, passages):
+        """
+        Shows how many passages are buffered and loads the next one if the reader is waiting for it.
+        """
+        if passages is not self.passage_queue:
+            return # The drill was cancelled
+        if self.next_pending and not passages.empty():
+            self.next_pending = False
+            self.next_button.config(text="Next passage")
+            self.next_passage()
+            if passages is not self.passage_queue:
+                return
+        if self.passage_done.is_set() and passages.empty():
+            self.cancel_pregeneration()
+            return
+        self.buffer_label.config(text=f"Buffered: {passages.qsize()}")
+        self.master.after(POLL_INTERVAL, lambda: self.poll_passages(passages))
+
+    def next_passage(self):
         """
-        Performs the actual text generation using the LLM.
+        Loads the next buffered passage, or waits for it if it is still being generated.
         """
+        if self.passage_queue is None:
+            return
         try:
-            # LLM call
-            output = self.llm(prompt=f"{prompt}.", max_tokens=0)
+            key, text = self.passage_queue.get_nowait()
+        except queue.Empty:
+            self.next_pending = True
+            self.next_button.config(text="Waiting...")
+            return
 
-            # Use plain text directly
-            self.plain_text = output['choices'][0]['text']
+        self.buffer_label.config(text=f"Buffered: {self.passage_queue.qsize()}")
+        if isinstance(text, Exception):
+            messagebox.showerror("Error", f"Failed to generate text: {str(text)}")
+            return
+        self.generation_cache.put(key, text)
+        self.plain_text = text
+        self.update_content('txt')
 
-            # Update UI with generated text (specify type as 'txt' or similar)
+    def template_prefix(self, template):
+        """
+        Returns the fixed (text, cache key) prefix of a prompt template, or None if it has none.
+        """
+        prefix = template.split("{prompt}")[0]
+        if not prefix:
+            return None
+        return prefix, prefix_key(prefix, self.model_settings)
+
+    def _perform_generation(self, prompt):
+        """
+        Performs the text generation using the LLM on a background thread.
+        Generated text is streamed into the text area and can be read while it is produced.
+        Texts generated before with the same prompt, model and parameters are loaded from the cache.
+        """
+        prompt, prefix = self.compose_prompt(prompt)
+        self.generation_key = generation_cache.make_key(prompt, self.model_path, self.generation_params)
+        cached_text = self.generation_cache.get(self.generation_key)
+        if cached_text is not None:
+            self.plain_text = cached_text
             self.update_content('txt')
+            return
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate text: {str(e)}")
-        finally:
-            # Reset button and cursor in the finally block
-            self.generate_button.config(state=tk.NORMAL)
-            self.master.config(cursor="")
+        self.clear_content()
+        self.generating = True
+        self.generation_failed = False
+        self.content_loading = True
+        self.generate_button.config(text="Cancel")
+
+        self.stream_results = queue.Queue()
+        self.stream_cancel = threading.Event()
+        threading.Thread(target=stream_completion, args=(self.llm, self.llm_lock, prompt, self.generation_params, self.stream_results, self.stream_cancel, prefix, self.prefix_states), daemon=True).start()
+        self.master.after(POLL_INTERVAL, lambda results=self.stream_results: self.poll_generation(results))
+
+    def poll_generation(self, results):
+        """
+        Appends the text generated so far to the text area and indexes the complete words.
+        """
+        if results is not self.stream_results:
+            return # The generation was cancelled by loading other content
+
+        pieces = []
+        done = False
+        try:
+            while True:
+                piece = results.get_nowait()
+                if piece is None:
+                    done = True
+                    break
+                if isinstance(piece, Exception):
+                    self.generation_failed = True
+                    messagebox.showerror("Error", f"Failed to generate text: {str(piece)}")
+                    continue
+                pieces.append(piece)
+        except queue.Empty:
+            pass
+
+        if pieces:
+            self.append_text("".join(pieces))
+        if pieces or done:
+            self.index_appended_text(done)
+            self.update_word_count()
+
+        if done:
+            self.content_loading = False
+            if not self.generation_failed and not self.stream_cancel.is_set() and self.plain_text:
+                self.generation_cache.put(self.generation_key, self.plain_text)
+            self.finish_generation()
+            self.start_classification()
+        else:
+            self.master.after(POLL_INTERVAL, lambda: self.poll_generation(results))
+
+    def append_text(self, text, separator=""):
+        """
+        Appends text to the loaded content and the text area, after separator if there is content already.
+        """
+        if self.plain_text:
+            text = separator + text
+        self.plain_text += text
+        self.text_area.config(state='normal')
+        self.text_area.insert('end-1c', text)
+        self.text_area.config(state='disabled')
+        self.index_lines(self.plain_text)
+
+    def index_appended_text(self, final):
+        """
+        Adds the words appended since the last call to the word index.
+        The last word is held back until more text follows, since the next token may continue it.
+        """
+        words, starts, ends = build_word_index(self.plain_text[self.indexed_upto:], self.indexed_upto)
+        if not final and words and ends[-1] == len(self.plain_text):
+            words.pop()
+            starts.pop()
+            ends.pop()
+        if words:
+            self.add_boundaries(*find_boundaries(self.plain_text[self.indexed_upto:], self.indexed_upto, starts), len(self.word_starts))
+            self.indexed_upto = ends[-1]
+            self.words.extend(words)
+            self.word_starts.extend(starts)
+            self.word_ends.extend(ends)
+            self.stop_flags.extend(build_stop_flags(words, self.stop_words))
+            self.extend_dwell()
+
+    def finish_generation(self):
+        """
+        Restores the Generate button once a generation has ended.
+        """
+        self.generating = False
+        self.generate_button.config(text="Generate Text", state=tk.NORMAL)
 
     def start_timer(self):
         """
@@ -366,27 +2440,30 @@ class speed_reader:
         if not self.timer_running:
             # If resuming from pause, elapsed_time is already set.
             # If starting fresh, elapsed_time is 0.
-            self.start_time = time.time() - self.elapsed_time
+            now = time.perf_counter()
+            self.start_time = now - self.elapsed_time
 
             # Reset highlight position only if starting fresh or after reset
             if self.elapsed_time == 0:
-                self.last_highlight_end_pos = "1.0"
-                self.current_word_index = 0
+                self.trace.clear()
+                self.last_highlight = None
+                self.words_batched = 0
+                self.words_read = 0
                 # Remove any lingering highlights from previous runs
                 self.text_area.tag_remove("highlight", "1.0", tk.END)
                 self.text_area.tag_remove("stop_highlight", "1.0", tk.END)
 
             self.timer_running = True
-            self.highlighting_running = self.highlighting_enabled
-            self.update_timer() # Start the timer update loop
+            self.highlighting_running = self.highlighting_enabled or self.mode_var.get() == "RSVP"
+            self.set_pace_anchor(now)
+            self.trace.record(TRACE_START, self.current_word_index, now, now)
 
             self.start_button.config(state=tk.DISABLED)
             self.pause_button.config(state=tk.NORMAL)
             self.stop_button.config(state=tk.NORMAL)
             self.reset_button.config(state=tk.NORMAL) # Keep reset enabled
 
-            if self.highlighting_running:
-                self.highlight_words() # Start or resume highlighting
+            self.start_scheduler() # Start the timer and highlighting loop
 
     def pause_timer(self):
         """
@@ -396,8 +2473,13 @@ class speed_reader:
         if self.timer_running:
             self.timer_running = False
             self.highlighting_running = False
+            self.cancel_scheduler()
             # Record elapsed time when pausing
-            self.elapsed_time = time.time() - self.start_time
+            now = time.perf_counter()
+            self.elapsed_time = now - self.start_time
+            self.update_timer(now)
+            self.trace.record(TRACE_PAUSE, self.current_word_index, now, now)
+            self.save_session()
 
             self.start_button.config(state=tk.NORMAL)
             self.pause_button.config(state=tk.DISABLED)
@@ -412,18 +2494,32 @@ class speed_reader:
         if self.timer_running:
             self.timer_running = False # Stop timer updates
             self.highlighting_running = False # Stop highlighting
+            self.cancel_scheduler()
             # Calculate final elapsed time
-            self.elapsed_time = time.time() - self.start_time
+            now = time.perf_counter()
+            self.elapsed_time = now - self.start_time
+            self.trace.record(TRACE_STOP, self.current_word_index, now, now)
         # else: Timer wasn't running, but we still might want to show stats based on last pause
 
         total_time = self.elapsed_time
         if total_time > 0:
             # Use the actual number of words highlighted for WPM calculation
-            words_processed = self.current_word_index
+            words_processed = self.words_read
             wpm = int(words_processed / (total_time / 60)) if total_time > 0 else 0
-            messagebox.showinfo("Reading Stats", f"Words per minute: {wpm}\n(Processed {words_processed}/{self.word_count} words in {total_time:.2f}s)")
-
-        # Reset everything after stopping and showing stats
+            self.session_stats = {
+                "measured_wpm": words_processed / (total_time / 60),
+                "target_wpm": self.pace_wpm,
+                "words": words_processed,
+                "words_batched": self.words_batched,
+                "seconds": total_time
+            }
+            stats = f"Words per minute: {wpm}"
+            if (self.highlighting_enabled or self.mode_var.get() == "RSVP") and self.pace_wpm:
+                stats += f" (target {self.pace_wpm})"
+            messagebox.showinfo("Reading Stats", f"{stats}\n(Processed {words_processed}/{self.word_count} words in {total_time:.2f}s)")
+
+        # Remember where reading stopped, then reset everything
+        self.save_session()
         self.reset_timer()
 
     def reset_timer(self):
@@ -433,10 +2529,12 @@ class speed_reader:
         """
         self.timer_running = False
         self.highlighting_running = False
+        self.cancel_scheduler()
         self.elapsed_time = 0
         self.start_time = 0 # Reset start time as well
         self.current_word_index = 0
-        self.last_highlight_end_pos = "1.0" # Reset highlight search position
+        self.last_highlight = None
+        self.rewind_target = None
         self.timer_label.config(text="Time: 00:00.00")
 
         # Reset button states based on whether text is loaded
@@ -449,26 +2547,211 @@ class speed_reader:
         # Remove highlight tags
         self.text_area.tag_remove("highlight", "1.0", tk.END)
         self.text_area.tag_remove("stop_highlight", "1.0", tk.END)
+        self.clear_rsvp()
+
+    def start_over(self):
+        """
+        Resets the timer and forgets the saved reading position of the loaded document.
+        """
+        self.reset_timer()
+        self.forget_session()
+
+    def add_boundaries(self, sentences, paragraphs, base):
+        """
+        Appends sentence and paragraph starts found by find_boundaries for the words from index base on.
+        """
+        for boundaries, found in ((self.sentence_starts, sentences), (self.paragraph_starts, paragraphs)):
+            skip = 1 if found and base + found[0] <= boundaries[-1] else 0
+            boundaries.extend(base + index for index in found[skip:])
+
+    def skip(self, boundaries, step):
+        """
+        Moves back to the start of the sentence or paragraph of the word last shown (step -1)
+        or forward to the start of the next one after the reading position (step 1).
+        Pressing back again within REWIND_AGAIN_INTERVAL, or before reading has moved past the word
+        skipped to, moves to the previous one.
+        """
+        if not self.word_starts:
+            return
+        if step < 0:
+            now = time.perf_counter()
+            shown = self.current_word_index - 1
+            if self.rewind_target is not None and (shown <= self.rewind_target or now - self.rewind_at < REWIND_AGAIN_INTERVAL):
+                # While reading, the word skipped to has been shown already
+                shown = min(shown, self.rewind_target - 1)
+            target = boundaries[max(0, bisect_right(boundaries, shown) - 1)]
+            self.seek(target)
+            self.rewind_target = target
+            self.rewind_at = now
+        else:
+            position = bisect_right(boundaries, self.current_word_index)
+            if position < len(boundaries):
+                self.seek(boundaries[position])
 
-    def update_timer(self):
+    def seek(self, index):
         """
-        Updates the timer label display every 100ms if the timer is running.
+        Moves the reading position to the word at index.
+        While reading, that word is shown right away and the pace continues from it.
         """
+        self.current_word_index = max(0, min(index, len(self.word_starts) - 1))
+        self.rewind_target = None
+        if self.last_highlight:
+            self.text_area.tag_remove(*self.last_highlight)
+            self.last_highlight = None
         if self.timer_running:
-            # Calculate current elapsed time based on start_time
-            current_elapsed = time.time() - self.start_time
-            minutes, seconds = divmod(int(current_elapsed), 60)
-            centiseconds = int((current_elapsed - int(current_elapsed)) * 100)
-            self.timer_label.config(text=f"Time: {minutes:02d}:{seconds:02d}.{centiseconds:02d}")
-            # Schedule the next update
-            self.master.after(100, self.update_timer) # Update every 100ms for smoother display
+            self.set_pace_anchor(time.perf_counter())
+            self.start_scheduler()
+        else:
+            self.show_position()
+
+    def show_position(self):
+        """
+        Scrolls the text area to the word at the reading position, if it has been indexed yet.
+        """
+        if self.current_word_index < len(self.word_starts):
+            self.ensure_window(self.word_starts[self.current_word_index])
+            self.text_area.see(self.text_index(self.word_starts[self.current_word_index]))
+
+    def save_session(self):
+        """
+        Saves the reading position and time of the loaded document.
+        A document that has been read to the end starts over the next time.
+        Nothing is saved after a reset, so the position saved when reading stopped is kept.
+        """
+        if self.document_id is None:
+            return
+        index = self.current_word_index
+        elapsed = time.perf_counter() - self.start_time if self.timer_running else self.elapsed_time
+        if not self.content_loading and index >= self.word_count:
+            self.forget_session()
+            return
+        if index == 0 and elapsed == 0:
+            return
+        self.sessions[self.document_id] = {
+            "word": index,
+            "elapsed": round(elapsed, 3),
+            "words_read": self.words_read if elapsed else 0,
+            "words_batched": self.words_batched if elapsed else 0,
+            "saved": time.time()
+        }
+        save_sessions(self.sessions)
+
+    def forget_session(self):
+        """
+        Removes the saved reading position of the loaded document, so it starts over the next time.
+        """
+        if self.document_id is not None and self.sessions.pop(self.document_id, None) is not None:
+            save_sessions(self.sessions)
+
+    def restore_session(self):
+        """
+        Restores the saved reading position and time of the loaded document, if any.
+        Reading then resumes from there like after a pause, with the words read so far
+        counted in its statistics. The trace starts over, since it may hold another document's session.
+        """
+        session = self.sessions.get(self.document_id)
+        if not session:
+            return
+        self.current_word_index = session["word"]
+        self.rewind_target = None
+        # Entries saved without their word counts resume the position only
+        self.elapsed_time = session["elapsed"] if "words_read" in session else 0
+        self.words_read = session.get("words_read", 0)
+        self.words_batched = session.get("words_batched", 0)
+        self.trace.clear()
+        self.update_timer(self.start_time + self.elapsed_time)
+        self.show_position()
+
+    def on_close(self):
+        """
+        Saves the reading position and stops background work before the window closes.
+        """
+        self.cancel_scheduler()
+        self.close_document()
+        self.master.destroy()
+
+    def show_trace_summary(self):
+        """
+        Shows the timing summary of the last reading session in a window,
+        from which its per-word trace can be exported, and the stats recorded when reading was last stopped.
+        """
+        summary = self.trace.summary(self.pace_wpm)
+        lines = [
+            f"Words shown: {summary['words']}",
+            f"Effective WPM: {summary['effective_wpm']:.1f} (target {summary['target_wpm']})",
+            f"Reading time: {summary['reading_seconds']:.2f}s, {summary['pauses']} pauses ({summary['paused_seconds']:.2f}s)"
+        ]
+        for key, title in (("tick_lag_ms", "Tick lag"), ("word_lag_ms", "Word lag"), ("word_display_ms", "Word display")):
+            times = summary[key]
+            lines.append(f"{title}: p50 {times['p50']:.2f} ms, p95 {times['p95']:.2f} ms, p99 {times['p99']:.2f} ms, max {times['max']:.2f} ms")
+        if summary["dropped_events"]:
+            lines.append(f"Only the last {summary['events']} events were kept")
+        if self.session_stats:
+            stats = self.session_stats
+            lines.append(f"Last stopped: {stats['measured_wpm']:.1f} WPM (target {stats['target_wpm']}), "
+                         f"{stats['words']} words in {stats['seconds']:.2f}s, {stats['words_batched']} shown to catch up")
+
+        window = tk.Toplevel(self.master)
+        window.title("Session Trace")
+        tk.Label(window, text="\n".join(lines), justify=tk.LEFT).pack(padx=10, pady=10)
+        tk.Button(window, text="Export...", command=self.export_trace).pack(pady=(0, 10))
+
+    def export_trace(self):
+        """
+        Exports the trace of the last reading session to a JSON or CSV file.
+        """
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json"), ("CSV", "*.csv")])
+        if not path:
+            return
+        try:
+            self.trace.export(path, self.pace_wpm)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to export the trace: {str(e)}")
+
+    def update_timer(self, now):
+        """
+        Updates the timer label display, called by the scheduler at least every TIMER_INTERVAL.
+        """
+        # Calculate current elapsed time based on start_time
+        current_elapsed = now - self.start_time
+        minutes, seconds = divmod(int(current_elapsed), 60)
+        centiseconds = int((current_elapsed - int(current_elapsed)) * 100)
+        self.timer_label.config(text=f"Time: {minutes:02d}:{seconds:02d}.{centiseconds:02d}")
 
     def on_select_language(self, event):
         """
         Callback function for when a language is selected from the combobox.
-        Loads the corresponding stop words.
+        Switches to the corresponding stop words and to the loaded words' flags for that language,
+        which are normally already in the cache.
+        A streamed document keeps its current flags until the background classification has them.
         """
-        self.load_stop_words(self.language_var.get().lower())
+        lang = self.language_var.get().lower()
+        self.load_stop_words(lang)
+        if lang in self.stop_flag_cache:
+            self.stop_flags = self.stop_flag_cache[lang]
+        elif self.mapped is not None:
+            # Indexing and classification in progress pick up the new language when they end
+            if not self.content_loading and self.classify_results is None:
+                self.start_classification(self.stop_flag_cache, stale=True)
+            return
+        else:
+            self.stop_flags = build_stop_flags(self.words, self.stop_words)
+            if not self.content_loading:
+                self.stop_flag_cache[lang] = self.stop_flags
+        self.update_dwell_stops()
+
+    def on_select_mode(self, event):
+        """
+        Callback function for when a reading mode is selected.
+        Pauses reading and swaps the text area for the RSVP display or back.
+        """
+        self.pause_timer()
+        if self.mode_var.get() == "RSVP":
+            self.text_area.pack_forget()
+            self.rsvp_canvas.pack(pady=10, padx=10, expand=True, fill=tk.BOTH)
+        else:
+            self.rsvp_canvas.pack_forget()
+            self.text_area.pack(pady=10, padx=10, expand=True, fill=tk.BOTH)
 
     def on_select_highlighting_color(self, event):
         """
@@ -490,14 +2773,22 @@ class speed_reader:
 
     def init_sound(self):
         """
-        Initializes the pygame mixer for sound playback.
+        Imports pygame and initializes its mixer for sound playback, the first time sound is needed.
         Returns True if successful, False otherwise.
         """
+        if self.pygame:
+            return True
+        try:
+            import pygame
+        except ImportError as e:
+            messagebox.showerror("Error", f"Sound is not available: {e}")
+            return False
         try:
             pygame.mixer.init()
         except pygame.error as e:
             messagebox.showerror("Error", f"Failed to init mixer: {e}")
             return False
+        self.pygame = pygame
         return True
 
     def toggle_sound(self):
@@ -506,17 +2797,518 @@ class speed_reader:
         Loads and plays or stops the sound file.
         """
         if self.sound_var.get(): # If checkbox is checked
+            if not self.init_sound():
+                self.sound_var.set(False)
+                self.sound_button.config(state=tk.DISABLED)
+                return
             try:
-                pygame.mixer.music.load(self.sound_path)
-                pygame.mixer.music.play(-1)  # Loop indefinitely
-            except pygame.error:
+                self.pygame.mixer.music.load(self.sound_path)
+                self.pygame.mixer.music.play(-1)  # Loop indefinitely
+            except self.pygame.error:
                 messagebox.showerror("Error", "Failed to load or play the sound file.")
                 self.sound_var.set(False) # Uncheck the box if sound fails
-        else: # If checkbox is unchecked
-            pygame.mixer.music.stop()
+        elif self.pygame: # If checkbox is unchecked
+            self.pygame.mixer.music.stop()
+
+class remote_llm:
+    """
+    Client for the model server started with --serve, used like a Llama instance.
+    Completions are streamed back as newline-delimited JSON.
+    """
+
+    def __init__(self, address):
+        self.host, self.port = parse_address(address)
+
+    def available(self):
+        """
+        Returns True if the model server answers.
+        """
+        import http.client
+        try:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=1)
+            connection.request("GET", "/health")
+            return connection.getresponse().status == 200
+        except OSError:
+            return False
+
+    def __call__(self, prompt, stream=True, prefix=None, **params):
+        import http.client
+        connection = http.client.HTTPConnection(self.host, self.port)
+        body = json.dumps({"prompt": prompt, "prefix": prefix, "params": params})
+        connection.request("POST", "/completion", body, {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        try:
+            if response.status != 200:
+                raise RuntimeError(f"Model server error {response.status}: {response.reason}")
+            for line in response:
+                message = json.loads(line)
+                if "error" in message:
+                    raise RuntimeError(message["error"])
+                if message.get("done"):
+                    break
+                yield {"choices": [{"text": message["text"]}]}
+        finally:
+            # Closing the connection early tells the server to stop generating
+            connection.close()
+
+class stub_llm:
+    """
+    Stand-in model for running the model server offline, e.g. for testing.
+    Echoes the prompt followed by a fixed text, word by word.
+    """
+
+    def __call__(self, prompt, stream=True, **params):
+        for word in f"{prompt} {STUB_TEXT}".split():
+            time.sleep(0.01)
+            yield {"choices": [{"text": word + " "}]}
+
+class model_server:
+    """
+    Local HTTP server sharing one loaded model between reader windows.
+    Requests are queued and run one at a time by a single worker thread.
+    Mixed into http.server's ThreadingHTTPServer by run_model_server, so http.server is only imported when serving.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, handler, llm, model_settings, states):
+        super().__init__(parse_address(address), handler)
+        self.llm = llm
+        self.model_settings = model_settings
+        self.states = states
+        self.jobs = queue.Queue()
+        threading.Thread(target=self.run_jobs, daemon=True).start()
+
+    def run_jobs(self):
+        """
+        Runs the queued completions in order, putting their text on each job's output queue.
+        """
+        while True:
+            prompt, prefix, params, output, cancel = self.jobs.get()
+            try:
+                if not cancel.is_set():
+                    prefix = (prefix, prefix_key(prefix, self.model_settings)) if prefix else None
+                    for chunk in complete(self.llm, prompt, params, prefix, self.states):
+                        if cancel.is_set():
+                            break
+                        output.put(chunk['choices'][0]['text'])
+            except Exception as e:
+                output.put(e)
+            output.put(None)
+
+class model_request_handler:
+    """
+    Handles the model server requests: GET /health and POST /completion.
+    Mixed into http.server's BaseHTTPRequestHandler by run_model_server.
+    """
+
+    def do_GET(self):
+        if self.path != "/health":
+            self.send_error(404)
+            return
+        self.send_json({"model": self.server.model_settings["model_path"], "queued": self.server.jobs.qsize()})
+
+    def do_POST(self):
+        if self.path != "/completion":
+            self.send_error(404)
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        except ValueError:
+            self.send_error(400)
+            return
+
+        output = queue.Queue()
+        cancel = threading.Event()
+        self.server.jobs.put((request["prompt"], request.get("prefix"), request.get("params", {}), output, cancel))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        try:
+            while True:
+                piece = output.get()
+                if piece is None:
+                    self.write_line({"done": True})
+                    break
+                if isinstance(piece, Exception):
+                    self.write_line({"error": str(piece)})
+                else:
+                    self.write_line({"text": piece})
+        except OSError:
+            cancel.set() # The reader went away or cancelled
+
+    def send_json(self, message):
+        """
+        Sends a complete JSON response.
+        """
+        body = json.dumps(message).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def write_line(self, message):
+        """
+        Streams one JSON line of a completion response.
+        """
+        self.wfile.write(json.dumps(message).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+def run_model_server(stub):
+    """
+    Loads the model configured in config.json once and serves it to reader windows until interrupted.
+    """
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    with open("config.json", "r") as config_file:
+        config = json.load(config_file)
+    address = config.get("model_server") or MODEL_SERVER_ADDRESS
+    model_settings = model_settings_from(config)
+
+    states = None
+    if stub:
+        llm = stub_llm()
+    else:
+        Llama = import_llama()
+        llm = Llama(verbose=False, **model_settings)
+        states = prefix_states_from(config)
+
+    server_class = type("model_server", (model_server, ThreadingHTTPServer), {})
+    handler_class = type("model_request_handler", (model_request_handler, BaseHTTPRequestHandler), {})
+    server = server_class(address, handler_class, llm, model_settings, states)
+    print(f"Serving {'the stub model' if stub else model_settings['model_path']} on {address}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+class null_widget:
+    """
+    Stand-in for Tk widgets when benchmarking without a display.
+    Every method call is accepted and does nothing.
+    """
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+def percentile(sorted_values, fraction):
+    """
+    Returns the value at the given fraction (0.0 - 1.0) of an already sorted list.
+    """
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def synthetic_text(word_count, stop_words, seed=0):
+    """
+    Generates a reproducible text of word_count words, mixing stop words and random words
+    into sentences and paragraphs.
+    """
+    import random
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = ["".join(rng.choice(letters) for _ in range(rng.randint(2, 12))) for _ in range(5000)]
+    common = sorted(stop_words) or vocabulary[:100]
+    paragraphs = []
+    sentences = []
+    written = 0
+    while written < word_count:
+        length = min(rng.randint(6, 20), word_count - written)
+        words = [rng.choice(common) if rng.random() < 0.4 else rng.choice(vocabulary) for _ in range(length)]
+        sentences.append(" ".join(words).capitalize() + ".")
+        written += length
+        if len(sentences) == 5:
+            paragraphs.append(" ".join(sentences))
+            sentences = []
+    paragraphs.append(" ".join(sentences))
+    return "\n\n".join(paragraphs)
+
+def benchmark_ticks(root, text, words, starts, ends, flags, ticks):
+    """
+    Times highlight_words for the first ticks words of an indexed text.
+    Uses a Tk Text widget when a display is available and null widgets otherwise.
+    Returns the per-tick latencies in seconds.
+    """
+    reader = speed_reader.__new__(speed_reader)
+    reader.init_reading_state()
+    if root:
+        reader.master = root
+        reader.text_area = tk.Text(root)
+        reader.text_area.insert('1.0', text)
+    else:
+        reader.master = null_widget()
+        reader.text_area = null_widget()
+        reader.is_visible = lambda start, end: False
+    reader.plain_text = text
+    reader.words, reader.word_starts, reader.word_ends, reader.stop_flags = words, starts, ends, flags
+    reader.index_lines(text)
+    reader.word_interval = 60 / BENCHMARK_WPM
+
+    latencies = []
+    for index in range(min(ticks, len(starts))):
+        now = reader.word_deadline(index)
+        tick_start = time.perf_counter()
+        reader.highlight_words(now)
+        latencies.append(time.perf_counter() - tick_start)
+    if root:
+        reader.text_area.destroy()
+    return latencies
+
+def check_text_indexes(root):
+    """
+    Checks that the Tk index range of every word of INDEX_CHECK_TEXT selects that word.
+    Uses a Tk Text widget when a display is available and the Tcl string commands otherwise.
+    Returns the words that were selected wrongly.
+    """
+    interp = root or tk.Tcl()
+    reader = speed_reader.__new__(speed_reader)
+    reader.init_reading_state()
+    reader.astral_extra = tk_astral_width(interp.tk) - 1
+    reader.index_lines(INDEX_CHECK_TEXT)
+    if root:
+        text_area = tk.Text(root)
+        text_area.insert('1.0', INDEX_CHECK_TEXT)
+        get = text_area.get
+    else:
+        lines = INDEX_CHECK_TEXT.split("\n")
+        def get(start, end):
+            line, first = text_position(start)
+            return interp.tk.call("string", "range", lines[line - 1], first, text_position(end)[1] - 1)
+
+    words, starts, ends = build_word_index(INDEX_CHECK_TEXT)
+    wrong = [word for word, start, end in zip(words, starts, ends)
+             if get(reader.text_index(start), reader.text_index(end)) != word]
+    if root:
+        text_area.destroy()
+    return wrong
+
+def run_benchmark(sizes, output):
+    """
+    Times tokenization, stop-word classification, index construction and highlight ticks
+    on synthetic texts of each size and writes the results as JSON.
+    """
+    import platform
+    import tracemalloc
+    try:
+        root = tk.Tk()
+        root.withdraw()
+    except tk.TclError:
+        root = None # No display, benchmark the ticks without the widget layer
+    stop_words = load_stop_word_table().get("english", frozenset())
+
+    results = []
+    for size in sizes:
+        text = synthetic_text(size, stop_words)
+        timings = {}
+
+        start = time.perf_counter()
+        WORD_PATTERN.findall(text)
+        timings["tokenize"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        words, starts, ends = build_word_index(text)
+        timings["word_index"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        flags = build_stop_flags(words, stop_words)
+        timings["stop_words"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        build_line_starts(text)
+        timings["line_starts"] = time.perf_counter() - start
+
+        latencies = sorted(benchmark_ticks(root, text, words, starts, ends, flags, BENCHMARK_TICKS))
+
+        # Peak memory of building the index, measured in a separate pass since tracing slows it down
+        del words, starts, ends, flags
+        tracemalloc.start()
+        build_stop_flags(build_word_index(text)[0], stop_words)
+        build_line_starts(text)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results.append({
+            "words": size,
+            "characters": len(text),
+            "seconds": timings,
+            "ticks": len(latencies),
+            "tick_ms": {
+                "p50": percentile(latencies, 0.50) * 1000,
+                "p95": percentile(latencies, 0.95) * 1000,
+                "p99": percentile(latencies, 0.99) * 1000,
+                "max": (latencies[-1] if latencies else 0) * 1000
+            },
+            "index_peak_memory_mb": peak_memory / (1024 * 1024)
+        })
+        print(f"Benchmarked {size} words", file=sys.stderr)
+
+    misplaced = check_text_indexes(root)
+    if misplaced:
+        print(f"Highlights misplaced on {', '.join(misplaced)}", file=sys.stderr)
+    if root:
+        root.destroy()
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "widgets": "tk" if root else "null",
+        "misplaced_highlights": misplaced,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results
+    }
+    if output:
+        with open(output, "w") as output_file:
+            json.dump(report, output_file, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+def iter_text_files(paths):
+    """
+    Yields the text files among paths, walking directories lazily in a stable order.
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for directory, subdirectories, files in os.walk(path):
+            subdirectories.sort()
+            for name in sorted(files):
+                if name.lower().endswith(COUNT_EXTENSIONS):
+                    yield os.path.join(directory, name)
+
+COUNT_STOP_WORDS = frozenset() # Stop words of the --count language in a worker process
+
+def init_count_worker(language):
+    """
+    Loads the stop words once per --count worker process.
+    """
+    global COUNT_STOP_WORDS
+    COUNT_STOP_WORDS = load_stop_word_store([language])[language]
+
+def count_file(path, encoding):
+    """
+    Counts the words, stop words and word characters of a file, reading plain text page by page.
+    The text is the one the reader shows for the file, so the counts match its word count.
+    Returns a (path, words, stop_words, word_characters, error) tuple.
+    """
+    words = stop_words = characters = 0
+    extractor = EXTRACTORS.get(os.path.splitext(path)[1].lower())
+    try:
+        with open(path, "rb") as count_file:
+            if os.fstat(count_file.fileno()).st_size == 0:
+                return path, 0, 0, 0, None
+            with mmap.mmap(count_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for text in iter_document_texts(data, encoding, extractor):
+                    page_words = WORD_PATTERN.findall(text)
+                    words += len(page_words)
+                    stop_words += sum(build_stop_flags(page_words, COUNT_STOP_WORDS))
+                    characters += sum(map(len, page_words))
+    except Exception as e:
+        return path, 0, 0, 0, str(e)
+    return path, words, stop_words, characters, None
+
+def count_record(result, wpm_values):
+    """
+    Turns a count_file result into an output record with reading-time estimates.
+    """
+    path, words, stop_words, characters, error = result
+    record = {
+        "path": path,
+        "words": words,
+        "stop_word_ratio": round(stop_words / words, 4) if words else 0,
+        "average_word_length": round(characters / words, 2) if words else 0
+    }
+    for wpm in wpm_values:
+        record[f"minutes_at_{wpm}_wpm"] = round(words / wpm, 2)
+    if error:
+        record["error"] = error
+    return record
+
+def run_count(paths, output_format, output, language, workers):
+    """
+    Counts the words of every text file under paths across a pool of processes and
+    streams one record per file as JSON Lines or CSV, in the order the files finish.
+    """
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+    with open("config.json", "r") as config_file:
+        config = json.load(config_file)
+    wpm_values = [int(wpm) for wpm in config.get("wpm_values", [250])]
+    language = (language or config.get("languages", ["English"])[0]).lower()
+    encoding = config.get("encoding", "utf-8")
+    workers = workers or os.cpu_count() or 1
+
+    output_file = open(output, "w", newline="") if output else sys.stdout
+    if output_format == "csv":
+        fields = ["path", "words", "stop_word_ratio", "average_word_length"]
+        fields += [f"minutes_at_{wpm}_wpm" for wpm in wpm_values] + ["error"]
+        writer = csv.DictWriter(output_file, fields)
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        write = lambda record: output_file.write(json.dumps(record) + "\n")
+
+    files = iter_text_files(paths)
+    counted = 0
+    try:
+        with ProcessPoolExecutor(workers, initializer=init_count_worker, initargs=(language,)) as pool:
+            # Only a few files per worker are queued at a time, so huge trees are never listed up front
+            pending = set()
+            for path in files:
+                pending.add(pool.submit(count_file, path, encoding))
+                if len(pending) < workers * COUNT_IN_FLIGHT:
+                    continue
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    write(count_record(future.result(), wpm_values))
+                counted += len(done)
+            for future in pending:
+                write(count_record(future.result(), wpm_values))
+            counted += len(pending)
+    finally:
+        if output:
+            output_file.close()
+    print(f"Counted {counted} files", file=sys.stderr)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=APP_TITLE)
+    parser.add_argument("--benchmark", action="store_true", help="time the reading hot paths on synthetic texts and exit")
+    parser.add_argument("--benchmark-sizes", type=int, nargs="+", default=BENCHMARK_SIZES, metavar="WORDS", help="word counts of the synthetic benchmark texts")
+    parser.add_argument("--output", help="file to write the benchmark or count results to, instead of stdout")
+    parser.add_argument("--build-stop-words", action="store_true", help="compile the NLTK stop-word corpus into the bundled stop-word file and exit")
+    parser.add_argument("--profile-startup", action="store_true", help="report the time spent in each startup phase")
+    parser.add_argument("--count", nargs="+", metavar="PATH", help="count the words of text files and directory trees and exit")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl", help="output format of --count")
+    parser.add_argument("--language", help="stop-word language of --count, the first configured language by default")
+    parser.add_argument("--workers", type=int, help="number of --count worker processes, one per CPU by default")
+    parser.add_argument("--serve", action="store_true", help="run the shared model server for other reader windows")
+    parser.add_argument("--stub-model", action="store_true", help="serve a stub model that echoes the prompt, to test without a GGUF file")
+    args = parser.parse_args()
+
+    if args.serve:
+        run_model_server(args.stub_model)
+        sys.exit()
+    if args.count:
+        run_count(args.count, args.format, args.output, args.language, args.workers)
+        sys.exit()
+    if args.benchmark:
+        run_benchmark(args.benchmark_sizes, args.output)
+        sys.exit()
+    if args.build_stop_words:
+        table = build_stop_word_file()
+        print(f"Wrote stop words for {len(table)} languages to {STOP_WORDS_PATH}")
+        sys.exit()
+
     # Main execution block: Create the Tkinter root window and run the application.
+    profile = startup_profile(MODULE_LOAD_START)
+    profile.mark("imports")
     root = tk.Tk()
-    app = speed_reader(root)
+    profile.mark("tk")
+    app = speed_reader(root, profile)
+    if args.profile_startup:
+        def report_startup():
+            root.update_idletasks()
+            profile.mark("first draw")
+            profile.report()
+        root.after_idle(report_startup)
     root.mainloop()
\ No newline at end of file